@@ -5,12 +5,13 @@ from pyramid.config import Configurator
 # import???
 from clld import interfaces as common_interfaces
 from clld.web.app import menu_item
-from clld.web.icon import DEFAULT_ICON, Icon
+from clld.web.icon import DEFAULT_ICON
 from clld_glottologfamily_plugin import util
 
 # we must make sure custom models are known at database initialization!
-from crossgram import models, md
+from crossgram import models, md, views
 from crossgram.interfaces import ITopic
+from crossgram.lib import map_markers
 
 
 _ = lambda s: s  # noqa: E731
@@ -36,23 +37,24 @@ _('Unit Values')
 
 class LanguageByFamilyMapMarker(util.LanguageByFamilyMapMarker):
     def __call__(self, ctx, req):
+        # value sets with several codes get a pie chart
+        if common_interfaces.IValueSet.providedBy(ctx) \
+                and (url := map_markers.valueset_marker_url(ctx)):
+            return url
         icon = self.get_icon(ctx, req) or DEFAULT_ICON
         # making icons directly instead of trying to register every possible
         # colour--shape combination
-        return Icon(icon).url(req)
+        return map_markers.icon_url(icon)
 
     def get_icon(self, ctx, req):
         if common_interfaces.IValueSet.providedBy(ctx):
-            icons = [
-                v.domainelement.jsondata['icon']
-                for v in ctx.values
-                if v.domainelement]
-            # FIXME(johannes): this only shows the *first* value
-            return icons[0] if len(icons) > 0 else None
-        elif common_interfaces.IValue.providedBy(ctx) and ctx.domainelement:
-            return ctx.domainelement.jsondata['icon']
+            icons = map_markers.valueset_icons(ctx)
+            return icons[0][0] if icons else None
+        elif common_interfaces.IValue.providedBy(ctx):
+            return map_markers.value_icon(ctx)
         elif common_interfaces.IDomainElement.providedBy(ctx):
-            return ctx.jsondata['icon']
+            return map_markers.domainelement_icons().get(ctx.pk) \
+                or ctx.jsondata['icon']
         else:
             return super().get_icon(ctx, req)
 
@@ -63,11 +65,25 @@ def main(_global_config, **settings):
     config = Configurator(settings=settings)
     config.include('clld.web.app')
     config.include('clld_glottologfamily_plugin')
+    config.include('crossgram.lib.response_cache')
+    config.include('crossgram.lib.static_geojson')
     config.registry.registerUtility(
         LanguageByFamilyMapMarker(), common_interfaces.IMapMarker)
 
     config.register_resource('topic', models.Topic, ITopic, with_index=True)
 
+    config.add_page(
+        'example_search',
+        pattern='/search/examples',
+        view=views.example_search,
+        template='example_search.mako')
+    # route name must match the `GlossTokens` data table
+    config.add_page(
+        'glosstokens',
+        pattern='/search/glosses',
+        view=views.gloss_search,
+        template='gloss_search.mako')
+
     config.register_menu(
         # ('dataset', partial(menu_item, 'dataset', label='Home')),
         ('contributions', partial(menu_item, 'contributions')),
@@ -76,6 +92,8 @@ def main(_global_config, **settings):
         ('units', partial(menu_item, 'units')),
         # ('unitparameters', partial(menu_item, 'unitparameters', label='C-Parameters')),
         ('sentences', partial(menu_item, 'sentences')),
+        ('example_search', partial(menu_item, 'example_search', label='Search examples')),
+        ('glosstokens', partial(menu_item, 'glosstokens', label='Search glosses')),
         ('topics', partial(menu_item, 'topics')),
         ('sources', partial(menu_item, 'sources')),
         # ('contributors', partial(menu_item, 'contributors')),
@@ -1,18 +1,82 @@
+from clld.db.meta import DBSession
+from clld.db.models import common
 from clld.web.adapters.geojson import GeoJsonParameter
 from clld import interfaces
+from sqlalchemy.orm import joinedload
+
+from crossgram import models
 
 
 class GeoJsonLParameter(GeoJsonParameter):
+    """GeoJSON of the values of a parameter.
+
+    For parameters with a closed domain, each feature has the index of its
+    code in the `domain` of the feature collection, so a map can sort all
+    values into layers from a single response (see `LParameterMap`).
+
+    The code and the layer name are taken from the request, unless they are
+    given explicitly (see `crossgram.lib.static_geojson`).
+    """
+
+    def __init__(self, obj, domainelement=None, layer=None):
+        super().__init__(obj)
+        self.domainelement = domainelement
+        self.layer = layer
+        self._code_indices = None
+        self._valuesets = None
+
+    def featurecollection_properties(self, ctx, req):
+        properties = super().featurecollection_properties(ctx, req)
+        if self.layer is not None:
+            properties['layer'] = self.layer
+        return properties
+
+    def get_query(self, ctx, req):
+        # `LValueSet` so the columns of the subclass are loaded right away
+        return DBSession.query(models.LValueSet)\
+            .join(common.Value)\
+            .filter(common.ValueSet.parameter_pk == ctx.pk)\
+            .options(
+                joinedload(common.ValueSet.values)
+                .joinedload(common.Value.domainelement),
+                joinedload(common.ValueSet.language))
+
+    def feature_iterator(self, ctx, req):
+        de = self.domainelement or req.params.get('domainelement')
+        if de:
+            valuesets = [
+                vs for vs in ctx.valuesets
+                if vs.values
+                and vs.values[0].domainelement
+                and vs.values[0].domainelement.id == de]
+        else:
+            valuesets = self.get_query(ctx, req)
+        # hold on to the value sets until their values are serialised, or
+        # they drop out of the session and are loaded again one by one
+        self._valuesets = list(valuesets)
+        return self._valuesets
+
+    def code_index(self, ctx, valueset):
+        if self._code_indices is None:
+            self._code_indices = {
+                de.pk: index for index, de in enumerate(ctx.domain)}
+        # like the map marker, this only goes by the *first* value
+        for value in valueset.values:
+            if value.domainelement_pk is not None:
+                return self._code_indices.get(value.domainelement_pk)
+        return None
 
     def feature_properties(self, ctx, req, valueset):
         # use language names as tool tips for parameters with a closed domain
         if getattr(ctx, 'domain', None):
-            label = self.get_language(ctx, req, valueset).name
+            return {
+                'values': list(valueset.values),
+                'label': self.get_language(ctx, req, valueset).name,
+                'code': self.code_index(ctx, valueset)}
         else:
-            label = ', '.join(v.name for v in valueset.values if v.name)
-        return {
-            'values': list(valueset.values),
-            'label': label}
+            return {
+                'values': list(valueset.values),
+                'label': ', '.join(v.name for v in valueset.values if v.name)}
 
 
 def includeme(config):
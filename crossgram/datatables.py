@@ -1,9 +1,8 @@
-from itertools import chain
-from functools import partial
+from collections import namedtuple
 
 from clld.db.meta import DBSession
 from clld.db.models import common
-from clld.db.util import get_distinct_values, icontains
+from clld.db.util import icontains
 from clld.web import datatables
 from clld.web.datatables.base import (
     Col, DataTable, DetailsRowLinkCol, ExternalLinkCol, LinkCol, LinkToMapCol,
@@ -18,11 +17,14 @@ from clld.web.util.helpers import (
 )
 from clld.web.util.htmllib import HTML
 from clld_glottologfamily_plugin.models import Family
-from sqlalchemy import func, null, select
-from sqlalchemy.orm import joinedload
+from pyramid.traversal import quote_path_segment
+from sqlalchemy import and_, null, select
 from sqlalchemy.sql.expression import case
 
 from crossgram import models
+from crossgram.lib.data_generation import GenerationCache
+from crossgram.lib.eager_loading import EagerLoadingMixin
+from crossgram.lib.paging import SeekPagingMixin, constraint_pks
 from crossgram.lib.horrible_denormaliser import BlockDecoder
 
 
@@ -43,29 +45,62 @@ class DateCol(Col):
         return item.published.year
 
 
+FACET_CHOICES = GenerationCache()
+
+
+def facet_choices(datatable, name, query):
+    """Return the rows of a query for a column's list of choices.
+
+    The result is cached for each data table class, column and set of
+    constraints until the data changes.
+    """
+    key = (type(datatable).__name__, name, constraint_pks(datatable))
+    return FACET_CHOICES.get(
+        key, lambda: [tuple(row) for row in DBSession.execute(query)])
+
+
+def join_language_names(query, language_pk, contribution_pk):
+    """Join the names languages have in a specific contribution.
+
+    Needed by data tables containing a `CustomLangNameCol`.
+    """
+    return query.join(
+        models.ContributionLanguage,
+        and_(
+            models.ContributionLanguage.language_pk == language_pk,
+            models.ContributionLanguage.contribution_pk == contribution_pk))
+
+
+def prefetch_columns(datatable, items):
+    """Let the columns preload their data for the items of a page.
+
+    Columns with a `prefetch(items)` method get to load whatever they need
+    for all rows of the page at once, instead of running one query per row.
+    """
+    items = list(items)
+    for col in datatable.cols:
+        if (prefetch := getattr(col, 'prefetch', None)):
+            prefetch(items)
+    return items
+
+
 class CustomLangNameCol(Col):
 
+    """Language name as used in a contribution.
+
+    Sorting and searching need the query to `join_language_names`.
+    """
+
     def __init__(self, dt, name, contribution_pk, *args, **kwargs):
         self._contribution_pk = contribution_pk
         self._decoder = BlockDecoder(contribution_pk)
         super().__init__(dt, name, *args, **kwargs)
 
     def order(self):
-        return case(
-            (models.Variety.custom_names.like(self._decoder.sql_has_contrib),
-             func.substring(models.Variety.custom_names,
-                            self._decoder.regex_get_value)),
-            else_=models.Variety.name)
+        return models.ContributionLanguage.language_name
 
     def search(self, query_string):
-        if self._contribution_pk:
-            return case(
-                (models.Variety.custom_names.like(self._decoder.sql_has_contrib),
-                 models.Variety.custom_names.op('~*')(
-                     self._decoder.regex_search_value(query_string))),
-                else_=icontains(models.Variety.name, query_string))
-        else:
-            return icontains(models.Variety.name, query_string)
+        return icontains(models.ContributionLanguage.language_name, query_string)
 
     def format(self, item):
         obj = self.get_obj(item)
@@ -108,8 +143,8 @@ class CustomFamilyCol(Col):
                 .distinct()
         kw['choices'] = [('isolate', '--none--')]
         kw['choices'].extend(
-            (id_, name)
-            for id_, name in DBSession.execute(family_query))
+            (id_, family_name)
+            for id_, family_name in facet_choices(dt, name, family_query))
         super().__init__(dt, name, **kw)
 
     def order(self):
@@ -278,104 +313,170 @@ class ParameterTopicsCol(Col):
 
 
 class TopicParametersCol(Col):
-    """Column listing linked parameters for a topic."""
+    """Column listing linked parameters for a topic.
+
+    The parameters are stored in the topic itself (see `Topic.parameter_list`)
+    so they don't need to be queried separately.
+    """
 
     __kw__ = {'bSearchable': False, 'bSortable': False}
 
+    # css classes `clld.web.util.helpers.link` would add
+    link_classes = {'parameter': 'Parameter', 'unitparameter': 'UnitParameter'}
+
     def format(self, item):
         obj = self.get_obj(item)
-        lparameters = (assoc.parameter for assoc in obj.parameter_assocs)
-        cparameters = (assoc.unitparameter for assoc in obj.unitparameter_assocs)
         return '; '.join(
-            link(self.dt.req, parameter, label=parameter.name)
-            for parameter in chain(lparameters, cparameters))
+            HTML.a(
+                parameter.name,
+                class_=self.link_classes[parameter.route],
+                href=self.dt.req.route_url(parameter.route, id=parameter.id),
+                title=parameter.name)
+            for parameter in obj.parameter_links())
 
 
-def object_examples(contribution, obj):
-    return [
-        example
-        for example in getattr(obj, 'sentences', ())
-        if not contribution
-        or example.contribution_pk == contribution.pk]
+ExampleLink = namedtuple('ExampleLink', 'id number contribution_number')
 
 
-def construction_examples(_, construction):
-    # NOTE: duck-typing this for lvalues and cvalues as well
-    # no need to filter by contrib; constructions are tied to them anyways
-    return [
-        assoc.sentence
-        for assoc in construction.sentence_assocs]
+def example_links(key, pks, contribution_pk=None):
+    """Load what's needed to link to the examples of several objects.
+
+    `key` is the column pointing from the examples (or an association table
+    like `UnitSentence`) to the objects, e.g. `Sentence.language_pk`.  Only
+    the ids and numbers of the examples are queried, instead of the full
+    sentences with all their text, and they come back in the order they
+    are listed in.
+    """
+    if not pks:
+        return {}
+    query = DBSession.query(
+        key,
+        common.Sentence.id,
+        models.Example.number,
+        models.CrossgramData.number,
+    ) \
+        .select_from(models.Example) \
+        .join(models.Example.contribution) \
+        .filter(key.in_(pks))
+    if key.class_ is not common.Sentence:
+        query = query.join(
+            key.class_, key.class_.sentence_pk == models.Example.pk)
+    if contribution_pk is not None:
+        query = query \
+            .filter(models.Example.contribution_pk == contribution_pk) \
+            .order_by(models.Example.number, models.Example.pk)
+    else:
+        query = query.order_by(
+            models.CrossgramData.number, models.Example.number,
+            models.Example.pk)
+    examples = {}
+    for pk, *example in query:
+        examples.setdefault(pk, []).append(ExampleLink(*example))
+    return examples
+
+
+URL_PLACEHOLDER = 'URL_PLACEHOLDER'
+
+
+def url_template(req, route):
+    """Return a function turning ids into urls for a route.
+
+    Generating every single url with `route_url` is surprisingly slow, so
+    this only generates one and fills in the ids.
+    """
+    prefix, suffix = req.route_url(route, id=URL_PLACEHOLDER) \
+        .split(URL_PLACEHOLDER)
+    return lambda id_: f'{prefix}{quote_path_segment(id_)}{suffix}'
 
 
 class ExamplesCol(Col):
-    """Column listing linked examples."""
+    """Column listing linked examples.
+
+    The examples of all rows on a page are loaded at once by `prefetch` (see
+    `prefetch_columns` and `example_links`).  Within a contribution, examples
+    are labelled with their number, otherwise with their id.
+    """
 
     __kw__ = {'bSearchable': False, 'bSortable': False}
 
-    def __init__(self, *args, example_collector=object_examples, **kwargs):
+    def __init__(self, *args, key, contribution_pk=None, **kwargs):
         super().__init__(*args, **kwargs)
-        self._example_collector = example_collector
+        self._key = key
+        self._contribution_pk = contribution_pk
+        self._examples = {}
+        self._prefetched = set()
+        self._url = None
+
+    def prefetch(self, items):
+        pks = {self.get_obj(item).pk for item in items}
+        self._examples.update(example_links(
+            self._key, pks - self._prefetched, self._contribution_pk))
+        self._prefetched.update(pks)
 
     def format(self, item):
         obj = self.get_obj(item)
-        contribution = getattr(self.dt, 'crossgramdata', None)
-
-        def _label(example):
-            if contribution:
-                return f'({example.number})'
+        if obj.pk not in self._prefetched:
+            self.prefetch([item])
+        if self._url is None:
+            self._url = url_template(self.dt.req, 'sentence')
+
+        def _link(example):
+            if self._contribution_pk:
+                label = f'({example.number})'
             else:
-                return f'({example.id})'
+                label = f'({example.id})'
+            return HTML.a(
+                label,
+                class_='Sentence',
+                href=self._url(example.id),
+                title=label)
 
-        examples = self._example_collector(contribution, obj)
-        if contribution:
-            examples.sort(key=lambda ex: ex.number)
-        else:
-            examples.sort(key=lambda ex: (ex.contribution.number, ex.number))
         return semicolon_separated_span(
-            link(self.dt.req, example, label=_label(example))
-            for example in examples)
-
-
-def object_constructions(obj):
-    # XXX(johannes): This is terrible.
-    # Long story short: common.Unit does not define a backref property for the
-    # `language` foreign key, so I can't just `language.units` (though I'm not
-    # sure if that would be *actually* less terrible to begin with)…
-    return list(
-        DBSession.query(models.Construction)
-        .join(models.Construction.language)
-        .filter(common.Language.pk == obj.pk))
-
-
-def object_constructions_by_contrib(contribution_pk, obj):
-    # XXX(johannes): This is terrible.
-    # Long story short: common.Unit does not define a backref property for the
-    # `language` foreign key, so I can't just `language.units` (though I'm not
-    # sure if that would be *actually* less terrible to begin with)…
-    assert contribution_pk is not None, 'we have a separate func for that'
-    return list(
-        DBSession.query(models.Construction)
-        .join(models.Construction.language)
-        .filter(common.Language.pk == obj.pk)
-        .filter(models.Construction.contribution_pk == contribution_pk))
+            _link(example) for example in self._examples.get(obj.pk, ()))
+
+
+def constructions_by_language(language_pks, contribution_pk=None):
+    """Load the constructions of several languages in one query."""
+    if not language_pks:
+        return {}
+    query = DBSession.query(models.Construction) \
+        .filter(models.Construction.language_pk.in_(language_pks))
+    if contribution_pk is not None:
+        query = query.filter(
+            models.Construction.contribution_pk == contribution_pk)
+    constructions = {}
+    for construction in query:
+        constructions.setdefault(construction.language_pk, []).append(
+            construction)
+    return constructions
 
 
 class ConstructionsCol(Col):
-    """Column listing linked constructions."""
+    """Column listing linked constructions.
+
+    The constructions of all languages on a page are loaded at once by
+    `prefetch` (see `prefetch_columns`).
+    """
 
     __kw__ = {'bSearchable': False, 'bSortable': False}
 
     def __init__(self, *args, contribution_pk=None, **kwargs):
         super().__init__(*args, **kwargs)
-        if contribution_pk is None:
-            self._construction_collector = object_constructions
-        else:
-            self._construction_collector = partial(
-                object_constructions_by_contrib, contribution_pk)
+        self._contribution_pk = contribution_pk
+        self._constructions = {}
+        self._prefetched = set()
+
+    def prefetch(self, items):
+        language_pks = {self.get_obj(item).pk for item in items}
+        self._constructions.update(constructions_by_language(
+            language_pks - self._prefetched, self._contribution_pk))
+        self._prefetched.update(language_pks)
 
     def format(self, item):
         obj = self.get_obj(item)
-        constructions = self._construction_collector(obj)
+        if obj.pk not in self._prefetched:
+            self.prefetch([item])
+        constructions = list(self._constructions.get(obj.pk, ()))
         if not constructions:
             return ''
 
@@ -394,6 +495,13 @@ class ConstructionsCol(Col):
                 for construction, label in zip(constructions, labels))
 
 
+class GlossTokenCol(Col):
+    """Gloss morpheme, which is only ever matched as a whole."""
+
+    def search(self, qs):
+        return self.model_col == qs.strip()
+
+
 # Datatables
 
 class CrossgramDatasets(DataTable):
@@ -438,18 +546,22 @@ class ContributionContributors(DataTable):
         return [name, contributions, address, url]
 
 
-class Languages(datatables.Languages):
+class Languages(EagerLoadingMixin, SeekPagingMixin, datatables.Languages):
 
     __constraints__ = [models.CrossgramData]
 
+    def prefetch_paths(self):
+        return [
+            (common.Language.references, models.LanguageReference.source)]
+
+    def get_query(self, *args, **kwargs):
+        return prefetch_columns(self, super().get_query(*args, **kwargs))
+
     def base_query(self, query):
         query = DBSession.query(models.Variety) \
             .join(models.Variety.family, isouter=True) \
             .join(models.Variety.contribution_assocs) \
-            .options(
-                joinedload(common.Language.references)
-                .joinedload(models.LanguageReference.source),
-                joinedload(common.Language.sentences))
+            .options(*self.prefetch_options())
 
         if self.crossgramdata:
             query = query.filter(
@@ -476,7 +588,10 @@ class Languages(datatables.Languages):
         family = CustomFamilyCol(
             self, 'family', models.Variety, contribution_pk=contribution_pk)
         linktomap = LinkToMapCol(self, 'm')
-        examples = ExamplesCol(self, 'examples')
+        examples = ExamplesCol(
+            self, 'examples',
+            key=common.Sentence.language_pk,
+            contribution_pk=contribution_pk)
         constructions = ConstructionsCol(
             self, 'constructions',
             contribution_pk=contribution_pk)
@@ -500,14 +615,17 @@ class Constructions(datatables.Units):
 
     __constraints__ = [common.Language, models.CrossgramData]
 
+    def get_query(self, *args, **kwargs):
+        return prefetch_columns(self, super().get_query(*args, **kwargs))
+
     def base_query(self, query):
-        query = DBSession.query(models.Construction).options(
-            joinedload(common.Unit.sentence_assocs)
-            .joinedload(models.UnitSentence.sentence))
+        query = DBSession.query(models.Construction)
 
         if self.crossgramdata:
             query = query.filter(
                 models.Construction.contribution_pk == self.crossgramdata.pk)
+            query = join_language_names(
+                query, models.Construction.language_pk, self.crossgramdata.pk)
         else:
             query = query.join(models.Construction.contribution)
 
@@ -529,7 +647,8 @@ class Constructions(datatables.Units):
             contrib_query = contrib_query.filter(
                 models.Construction.language_pk == self.language.pk)
         contrib_query = contrib_query.distinct()
-        contribs_with_constr = [c for c, in DBSession.execute(contrib_query)]
+        contribs_with_constr = [
+            c for c, in facet_choices(self, 'contribution', contrib_query)]
         contrib = LinkCol(
             self,
             'contribution',
@@ -537,7 +656,9 @@ class Constructions(datatables.Units):
             get_obj=lambda i: i.contribution,
             choices=contribs_with_constr)
         examples = ExamplesCol(
-            self, 'examples', example_collector=construction_examples)
+            self, 'examples',
+            key=models.UnitSentence.unit_pk,
+            contribution_pk=self.crossgramdata.pk if self.crossgramdata else None)
         if self.crossgramdata:
             language = CustomLangNameCol(
                 self, 'custom_name', self.crossgramdata.pk,
@@ -553,20 +674,21 @@ class Constructions(datatables.Units):
             return [language, name, desc, examples, contrib]
 
 
-class CParameters(datatables.Unitparameters):
+class CParameters(EagerLoadingMixin, datatables.Unitparameters):
 
     __constraints__ = [models.CrossgramData]
 
+    def prefetch_paths(self):
+        return [
+            (common.UnitParameter.topic_assocs, models.UnitParameterTopic.topic)]
+
     def base_query(self, query):
         if self.crossgramdata:
             query = query.filter(
                 models.CParameter.contribution_pk == self.crossgramdata.pk)
         else:
             query = query.join(models.CParameter.contribution)
-        query = query.options(
-            joinedload(common.UnitParameter.topic_assocs)
-            .joinedload(models.UnitParameterTopic.topic))
-        return query
+        return query.options(*self.prefetch_options())
 
     def col_defs(self):
         # TODO(johannes): list of linked topics
@@ -587,7 +709,7 @@ class CParameters(datatables.Unitparameters):
                 .order_by(models.CrossgramData.name)\
                 .distinct()
             contribs_with_cparam = [
-                c for c, in DBSession.execute(contrib_query)]
+                c for c, in facet_choices(self, 'contribution', contrib_query)]
             contrib = LinkCol(
                 self,
                 'contribution',
@@ -597,7 +719,7 @@ class CParameters(datatables.Unitparameters):
             return [details, contrib, name, desc, topics, langcount]
 
 
-class CValues(datatables.Unitvalues):
+class CValues(EagerLoadingMixin, SeekPagingMixin, datatables.Unitvalues):
 
     __constraints__ = [
         common.Unit,
@@ -605,19 +727,24 @@ class CValues(datatables.Unitvalues):
         common.Contribution,
         common.Language]
 
+    def prefetch_paths(self):
+        return [(common.UnitValue.references, models.UnitValueReference.source)]
+
+    def get_query(self, *args, **kwargs):
+        return prefetch_columns(self, super().get_query(*args, **kwargs))
+
     def base_query(self, query):
         query = DBSession.query(common.UnitValue) \
             .join(common.UnitValue.unit) \
             .join(common.UnitValue.unitdomainelement, isouter=True) \
-            .options(
-                joinedload(common.UnitValue.references)
-                .joinedload(models.UnitValueReference.source),
-                joinedload(common.UnitValue.sentence_assocs)
-                .joinedload(models.UnitValueSentence.sentence))
+            .options(*self.prefetch_options())
 
         if self.unitparameter:
             query = query.filter(
                 common.UnitValue.unitparameter_pk == self.unitparameter.pk)
+            query = join_language_names(
+                query, common.Unit.language_pk,
+                self.unitparameter.contribution_pk)
         else:
             query = query.join(common.UnitValue.unitparameter)
 
@@ -634,9 +761,6 @@ class CValues(datatables.Unitvalues):
             query = query.join(common.Unit.language)
 
         if self.unit:
-            query = query.options(
-                joinedload(models.CValue.sentence_assocs)
-                .joinedload(models.UnitValueSentence.sentence))
             query = query.filter(
                 common.UnitValue.unit_pk == self.unit.pk)
 
@@ -658,13 +782,18 @@ class CValues(datatables.Unitvalues):
         comment = Col(self, 'description', sTitle='Comment')
         source = RefsCol(self, 'source')
         examples = ExamplesCol(
-            self, 'examples', example_collector=construction_examples)
+            self, 'examples', key=models.UnitValueSentence.unitvalue_pk)
         contrib = LinkCol(
             self,
             'contribution',
             model_col=models.Contribution.name,
             get_obj=lambda i: i.contribution,
-            choices=get_distinct_values(models.Contribution.name))
+            choices=[
+                c for c, in facet_choices(
+                    self, 'contribution',
+                    select(models.Contribution.name)
+                    .order_by(models.Contribution.name)
+                    .distinct())])
 
         # XXX(johannes): is `contribution` ever set?
         # XXX(johannes): can `unitparameter` and `language` be set at the same time?
@@ -687,20 +816,20 @@ class CValues(datatables.Unitvalues):
             return [contrib, lang, constr, cparam, cvalue, comment, source]
 
 
-class LParameters(datatables.Parameters):
+class LParameters(EagerLoadingMixin, datatables.Parameters):
 
     __constraints__ = [models.CrossgramData]
 
+    def prefetch_paths(self):
+        return [(common.Parameter.topic_assocs, models.ParameterTopic.topic)]
+
     def base_query(self, query):
         if self.crossgramdata:
             query = query.filter(
                 models.LParameter.contribution_pk == self.crossgramdata.pk)
         else:
             query = query.join(models.LParameter.contribution)
-        query = query.options(
-            joinedload(common.Parameter.topic_assocs)
-            .joinedload(models.ParameterTopic.topic))
-        return query
+        return query.options(*self.prefetch_options())
 
     def col_defs(self):
         # TODO(johannes): list of linked topics
@@ -721,7 +850,7 @@ class LParameters(datatables.Parameters):
                 .order_by(models.CrossgramData.name)\
                 .distinct()
             contribs_with_lparam = [
-                c for c, in DBSession.execute(contrib_query)]
+                c for c, in facet_choices(self, 'contribution', contrib_query)]
             contrib = LinkCol(
                 self,
                 'contribution',
@@ -731,24 +860,31 @@ class LParameters(datatables.Parameters):
             return [details, contrib, name, desc, topics, langcount]
 
 
-class LValues(datatables.Values):
+class LValues(EagerLoadingMixin, SeekPagingMixin, datatables.Values):
 
     __constraints__ = [common.Parameter, common.Contribution, common.Language]
 
+    def prefetch_paths(self):
+        return [(
+            common.Value.valueset,
+            common.ValueSet.references,
+            common.ValueSetReference.source)]
+
+    def get_query(self, *args, **kwargs):
+        return prefetch_columns(self, super().get_query(*args, **kwargs))
+
     def base_query(self, query):
         query = DBSession.query(common.Value) \
             .join(common.Value.domainelement, isouter=True) \
             .join(common.ValueSet) \
-            .options(
-                joinedload(common.Value.valueset)
-                .joinedload(common.ValueSet.references)
-                .joinedload(common.ValueSetReference.source),
-                joinedload(common.Value.sentence_assocs)
-                .joinedload(common.ValueSentence.sentence))
+            .options(*self.prefetch_options())
 
         if self.parameter:
             query = query.filter(
                 common.ValueSet.parameter_pk == self.parameter.pk)
+            query = join_language_names(
+                query, common.ValueSet.language_pk,
+                self.parameter.contribution_pk)
         else:
             query = query.join(common.ValueSet.parameter)
 
@@ -789,7 +925,7 @@ class LValues(datatables.Values):
                 common.ValueSet.parameter_pk == self.parameter.pk)
         contrib_query = contrib_query.distinct()
         contribs_with_lval = [
-            c for c, in DBSession.execute(contrib_query)]
+            c for c, in facet_choices(self, 'contribution', contrib_query)]
         contrib = LinkCol(
             self,
             'contribution',
@@ -799,7 +935,7 @@ class LValues(datatables.Values):
         sources = RefsCol(self, 'source', get_object=lambda i: i.valueset)
         comment = Col(self, 'description', sTitle='Comment')
         examples = ExamplesCol(
-            self, 'examples', example_collector=construction_examples)
+            self, 'examples', key=common.ValueSentence.value_pk)
         # details = DetailsRowLinkCol(self, 'd')
 
         # XXX(johannes): is `contribution` *ever* set in crossgram?
@@ -828,18 +964,22 @@ class LValues(datatables.Values):
             return [contrib, lang, param, valueset, comment, sources]
 
 
-class Examples(datatables.Sentences):
+class Examples(EagerLoadingMixin, SeekPagingMixin, datatables.Sentences):
 
     __constraints__ = [common.Parameter, common.Language, models.CrossgramData]
 
+    def prefetch_paths(self):
+        return [
+            (common.Sentence.references, common.SentenceReference.source)]
+
     def base_query(self, query):
         query = super().base_query(query) \
-            .options(
-                joinedload(common.Sentence.references)
-                .joinedload(common.SentenceReference.source))
+            .options(*self.prefetch_options())
 
         if self.crossgramdata:
             query = query.filter(models.Example.contribution_pk == self.crossgramdata.pk)
+            query = join_language_names(
+                query, common.Sentence.language_pk, self.crossgramdata.pk)
         else:
             query = query.join(models.Example.contribution)
 
@@ -878,7 +1018,7 @@ class Examples(datatables.Sentences):
                 .order_by(models.CrossgramData.name)\
                 .distinct()
             contribs_with_ex = [
-                c for c, in DBSession.execute(contrib_query)]
+                c for c, in facet_choices(self, 'contribution', contrib_query)]
             contrib = LinkCol(
                 self,
                 'contribution',
@@ -896,10 +1036,74 @@ class Examples(datatables.Sentences):
             return {}
 
 
-class Sources(datatables.Sources):
+class GlossTokens(EagerLoadingMixin, DataTable):
+
+    # only many-to-one relationships, which don't multiply any rows
+    __prefetch_strategy__ = 'joined'
+
+    def prefetch_paths(self):
+        return [
+            (models.GlossToken.example, common.Sentence.language),
+            (models.GlossToken.contribution,)]
+
+    def base_query(self, query):
+        return query \
+            .join(models.GlossToken.example) \
+            .join(common.Sentence.language) \
+            .join(models.GlossToken.contribution) \
+            .options(*self.prefetch_options())
+
+    def col_defs(self):
+        contrib_query = select(models.CrossgramData.name)\
+            .join_from(models.Example, models.CrossgramData)\
+            .order_by(models.CrossgramData.name)\
+            .distinct()
+        contribs_with_ex = [
+            c for c, in facet_choices(self, 'contribution', contrib_query)]
+        return [
+            GlossTokenCol(self, 'token', sTitle='Morpheme'),
+            Col(self, 'word', sTitle='Analyzed word', sClass='object-language'),
+            Col(self, 'gloss', sClass='gloss'),
+            LinkCol(
+                self,
+                'example',
+                sTitle='Primary text',
+                sClass='object-language',
+                model_col=common.Sentence.name,
+                get_obj=lambda i: i.example),
+            Col(
+                self,
+                'description',
+                sTitle=self.req.translate('Translation'),
+                sClass='translation',
+                model_col=common.Sentence.description,
+                get_obj=lambda i: i.example),
+            LinkCol(
+                self,
+                'language',
+                model_col=common.Language.name,
+                get_obj=lambda i: i.example.language),
+            LinkCol(
+                self,
+                'contribution',
+                model_col=models.CrossgramData.name,
+                get_obj=lambda i: i.contribution,
+                choices=contribs_with_ex),
+        ]
+
+
+class Sources(EagerLoadingMixin, datatables.Sources):
 
     __constraints__ = [common.Language, models.CrossgramData]
 
+    def prefetch_paths(self):
+        # the languages column isn't shown for a single language
+        if self.language:
+            return []
+        return [(
+            models.CrossgramDataSource.languagereferences,
+            models.LanguageReference.language)]
+
     def base_query(self, query):
         query = DBSession.query(models.CrossgramDataSource)
 
@@ -907,10 +1111,7 @@ class Sources(datatables.Sources):
             query = query\
                 .join(models.CrossgramDataSource.languagereferences)\
                 .filter(models.LanguageReference.language_pk == self.language.pk)
-        else:
-            query = query.options(
-                joinedload(models.CrossgramDataSource.languagereferences)
-                .joinedload(models.LanguageReference.language))
+        query = query.options(*self.prefetch_options())
 
         if self.crossgramdata:
             query = query.filter(
@@ -937,7 +1138,7 @@ class Sources(datatables.Sources):
             .order_by(models.CrossgramData.name)\
             .distinct()
         contribs_with_src = [
-            c for c, in DBSession.execute(contrib_query)]
+            c for c, in facet_choices(self, 'contribution', contrib_query)]
         contrib = LinkCol(
             self,
             'contribution',
@@ -955,11 +1156,6 @@ class Sources(datatables.Sources):
 class Topics(DataTable):
 
     def base_query(self, query):
-        query = query.options(
-            joinedload(models.Topic.parameter_assocs)
-            .joinedload(models.ParameterTopic.parameter),
-            joinedload(models.Topic.unitparameter_assocs)
-            .joinedload(models.UnitParameterTopic.unitparameter))
         # TODO(johannes): remove when we move to showing *all* topics
         query = query.filter(models.Topic.used == True)  # noqa: E712
         return query
@@ -986,3 +1182,4 @@ def includeme(config):
     config.register_datatable('unitvalues', CValues)
     config.register_datatable('sources', Sources)
     config.register_datatable('topics', Topics)
+    config.register_datatable('glosstokens', GlossTokens)
@@ -0,0 +1,85 @@
+"""Fast path for writing large numbers of rows to the database.
+
+Adding objects through `DBSession.add_all` means every single row goes
+through sqlalchemy's unit of work, which gets really slow for contributions
+with hundreds of thousands of values.  `bulk_add_all` writes the exact same
+rows with one batched `executemany` per table instead.
+
+Primary keys are taken from the tables' sequences up front and assigned to
+the objects, so code further down the line can keep using `obj.pk` as if the
+objects had been flushed.  The objects themselves never enter the session.
+Databases without sequences (i.e. SQLite in the tests) get the primary keys
+after the biggest one in the table, which is only safe with a single writer.
+"""
+
+from itertools import groupby
+
+import sqlalchemy
+from clld.db.meta import DBSession
+
+from crossgram.lib.profiling import count_rows
+
+
+def allocate_pks(table, count):
+    """Reserve `count` primary keys from the sequence of `table`."""
+    if not count:
+        return []
+    if DBSession.get_bind().dialect.name != 'postgresql':
+        start = DBSession.query(sqlalchemy.func.max(table.c.pk)).scalar() or 0
+        return list(range(start + 1, start + count + 1))
+    query = sqlalchemy.text(
+        "SELECT nextval(pg_get_serial_sequence(:table, 'pk'))"
+        " FROM generate_series(1, :count)")
+    return [
+        pk
+        for pk, in DBSession.execute(
+            query, {'table': table.name, 'count': count})]
+
+
+def _mapped_tables(mapper):
+    # base table first, so foreign keys to it are satisfied
+    return [m.local_table for m in reversed(list(mapper.iterate_to_root()))]
+
+
+def _row_values(obj, mapper, table):
+    row = {}
+    for column in table.columns:
+        value = getattr(obj, mapper.get_property_by_column(column).key, None)
+        # same as the orm: let the database fill in default values
+        if value is None and (
+            column.default is not None or column.server_default is not None
+        ):
+            continue
+        row[column.key] = value
+    return row
+
+
+def _insert_objects(objects):
+    mapper = sqlalchemy.inspect(type(objects[0]))
+    tables = _mapped_tables(mapper)
+
+    for obj, pk in zip(objects, allocate_pks(tables[0], len(objects))):
+        obj.pk = pk
+
+    for table in tables:
+        rows = [_row_values(obj, mapper, table) for obj in objects]
+        # executemany needs the same set of columns in every row
+        for _, batch in groupby(rows, key=lambda row: tuple(row)):
+            DBSession.execute(table.insert(), list(batch))
+
+    count_rows(type(objects[0]), len(objects))
+
+
+def bulk_add_all(objects):
+    """Insert transient orm objects without going through the session.
+
+    Objects may only refer to other rows by primary key (e.g.
+    `language_pk=language.pk` instead of `language=language`).
+    """
+    by_class = {}
+    for obj in objects:
+        if type(obj) not in by_class:
+            by_class[type(obj)] = []
+        by_class[type(obj)].append(obj)
+    for class_objects in by_class.values():
+        _insert_objects(class_objects)
@@ -1,7 +1,10 @@
+import hashlib
+import pickle
 import re
+import shutil
 import sys
-from collections import namedtuple
-from itertools import chain, cycle
+from collections import Counter, OrderedDict, namedtuple
+from itertools import chain, cycle, islice
 
 import clld.db.models as common
 from clld.cliutil import bibtex2source
@@ -14,6 +17,8 @@ from nameparser import HumanName
 from pycldf import iter_datasets
 
 from crossgram import models
+from crossgram.lib.bulk_insert import bulk_add_all
+from crossgram.lib.profiling import steps
 
 
 MARTINS_FAVOURITE_ICONS = [
@@ -54,6 +59,9 @@ def parse_author(author_spec):
     return author_id, author_spec, parsed_name
 
 
+ExampleKey = namedtuple('ExampleKey', ('pk', 'number'))
+
+
 SourceTuple = namedtuple(
     'SourceTuple',
     ('bibkey', 'pages', 'source_string', 'source_pk'))
@@ -78,6 +86,50 @@ def shorten_url(property_url):
     return anchor
 
 
+class Row:
+    """Read-only, dict-like table row.
+
+    All rows of a table share the same column index, so a single row costs
+    little more than the tuple of its cells.
+    """
+
+    __slots__ = ('_columns', '_cells')
+
+    def __init__(self, columns, cells):
+        self._columns = columns
+        self._cells = cells
+
+    def __getitem__(self, key):
+        return self._cells[self._columns[key]]
+
+    def get(self, key, default=None):
+        index = self._columns.get(key)
+        return default if index is None else self._cells[index]
+
+    def __contains__(self, key):
+        return key in self._columns
+
+    def __iter__(self):
+        return iter(self._columns)
+
+    def __len__(self):
+        return len(self._columns)
+
+    def keys(self):
+        return self._columns.keys()
+
+    def items(self):
+        return ((key, self._cells[index]) for key, index in self._columns.items())
+
+    def __eq__(self, other):
+        if not hasattr(other, 'items'):
+            return NotImplemented
+        return dict(self.items()) == dict(other.items())
+
+    def __repr__(self):
+        return f'Row({dict(self.items())!r})'
+
+
 def read_table(cldf, table_name):
     table = cldf.get(table_name)
     if not table:
@@ -87,10 +139,22 @@ def read_table(cldf, table_name):
         column.name: shorten_url(column.propertyUrl.uri)
         for column in table.tableSchema.columns
         if column.propertyUrl}
+    colnames = columns = None
     for row in table:
-        yield {
-            column_map.get(colname, colname): cell
-            for colname, cell in row.items()}
+        # csvw gives us the same columns for every row, so the column index
+        # only needs to be built once
+        if (row_colnames := tuple(row)) != colnames:
+            colnames = row_colnames
+            columns = {
+                column_map.get(colname, colname): index
+                for index, colname in enumerate(colnames)}
+        yield Row(columns, tuple(row.values()))
+
+
+def iter_chunks(rows, chunk_size):
+    rows = iter(rows)
+    while (chunk := list(islice(rows, chunk_size))):
+        yield chunk
 
 
 def cldf_parameters_from_values(cldf_lvalues, cldf_cvalues):
@@ -233,7 +297,7 @@ def make_language(cldf_language, language_id, languoids):
             name=languoid.name,
             latitude=languoid.latitude or cldf_language['latitude'],
             longitude=languoid.longitude or cldf_language['longitude'],
-            macroarea=languoid.macroareas[0].name if languoid.macroareas else cldf_language['macroarea'])
+            macroarea=languoid.macroareas[0] if languoid.macroareas else cldf_language['macroarea'])
     else:
         return models.Variety(
             id=language_id,
@@ -272,6 +336,9 @@ def iter_contribution_languages(cldf_languages, languages, contribution):
             language_pk=languages[cldf_language['id']].pk,
             contribution_pk=contribution.pk,
             custom_language_name=cldf_language['name'],
+            language_name=(
+                (cldf_language['name'] or '').strip()
+                or languages[cldf_language['id']].name),
             source_comment=cldf_language.get('Source_comment'))
         for cldf_language in cldf_languages)
 
@@ -318,6 +385,13 @@ def iter_parameter_topics(cldf_parameters, lparameters, cparameters, topics):
         if (topic := topics.get(grammacode)))
 
 
+def mark_topics_as_used(cldf_parameters, topics):
+    for cldf_parameter in cldf_parameters:
+        for grammacode in cldf_parameter.get('Grammacodes', ()):
+            if (topic := topics.get(grammacode)):
+                topic.used = True
+
+
 def make_constructions(cldf_constructions, languages, contribution):
     return {
         cldf_construction['id']: models.Construction(
@@ -376,7 +450,7 @@ def make_ccodes(cldf_codes, cparameters, code_icons, contribution):
         if (cparameter := cparameters.get(parameter_id))}
 
 
-def make_examples(cldf_examples, languages, contribution):
+def make_examples(cldf_examples, languages, contribution, first_number=1):
     return {
         cldf_example['id']: models.Example(
             id=f'{contribution.number or contribution.id}-{number}',
@@ -391,7 +465,7 @@ def make_examples(cldf_examples, languages, contribution):
             language_pk=languages[cldf_example['languageReference']].pk,
             contribution_pk=contribution.pk,
             source_comment=cldf_example.get('Source_comment'))
-        for number, cldf_example in enumerate(cldf_examples, 1)}
+        for number, cldf_example in enumerate(cldf_examples, first_number)}
 
 
 def iter_example_sources(cldf_examples, examples, sources):
@@ -407,6 +481,33 @@ def iter_example_sources(cldf_examples, examples, sources):
         and source_tuple.source_pk is not None)
 
 
+# morpheme boundaries and other separators of the Leipzig Glossing Rules
+GLOSS_SEPARATORS = re.compile(r'[-=.:~\\<>]')
+
+
+def split_gloss(gloss):
+    """Split the gloss of a single word into its morphemes.
+
+    E.g. `1SG.POSS=house-PL` becomes `1SG`, `POSS`, `house` and `PL`.
+    """
+    return [token for token in GLOSS_SEPARATORS.split(gloss) if token]
+
+
+def iter_gloss_tokens(cldf_examples, examples, contribution):
+    for cldf_example in cldf_examples:
+        example_pk = examples[cldf_example['id']].pk
+        words = cldf_example['analyzedWord'] or ()
+        for position, gloss in enumerate(cldf_example['gloss'] or ()):
+            for token in split_gloss(gloss or ''):
+                yield models.GlossToken(
+                    example_pk=example_pk,
+                    contribution_pk=contribution.pk,
+                    position=position,
+                    word=words[position] if position < len(words) else None,
+                    gloss=gloss,
+                    token=token)
+
+
 def iter_construction_sources(cldf_constructions, constructions, sources):
     return (
         models.UnitReference(
@@ -450,7 +551,10 @@ def make_cvalues(
             id='{}-{}'.format(contribution.id, cldf_value['id']),
             unit_pk=constructions[cldf_value['Construction_ID']].pk,
             unitparameter_pk=cparameters[cldf_value['parameterReference']].pk,
-            unitdomainelement=(code := ccodes.get(cldf_value.get('codeReference'))),
+            unitdomainelement_pk=(
+                code.pk
+                if (code := ccodes.get(cldf_value.get('codeReference')))
+                else None),
             name=code.name if code and code.name else cldf_value['value'],
             contribution_pk=contribution.pk,
             description=cldf_value.get('comment'),
@@ -473,34 +577,81 @@ def make_lvaluesets(cldf_lvalues, languages, lparameters, contribution):
     return lvaluesets
 
 
-def iter_value_sources(cldf_lvalues, lvaluesets, sources):
+def collect_value_sources(cldf_lvalues, sources):
+    # collect sources for all values in the same value set
     valueset_refs = {}
     for cldf_value in cldf_lvalues:
-        valueset = lvaluesets[
+        valueset_key = (
             cldf_value['languageReference'],
-            cldf_value['parameterReference']]
+            cldf_value['parameterReference'])
         for source_string in sorted(set(cldf_value.get('source') or ())):
             source_tuple = parse_source(sources, source_string)
             if source_tuple and source_tuple.source_pk is not None:
-                # collect sources for all values in the same value set
-                if valueset.pk not in valueset_refs:
-                    valueset_refs[valueset.pk] = set()
-                valueset_refs[valueset.pk].add(source_tuple)
+                if valueset_key not in valueset_refs:
+                    valueset_refs[valueset_key] = set()
+                valueset_refs[valueset_key].add(source_tuple)
+    return valueset_refs
+
+
+def iter_value_sources(valueset_refs, valueset_pks):
     return (
         common.ValueSetReference(
             key=source_tuple.bibkey,
             description=source_tuple.pages or None,
-            valueset_pk=valueset_pk,
+            valueset_pk=valueset_pks[valueset_key],
             source_pk=source_tuple.source_pk)
-        for valueset_pk, st_set in valueset_refs.items()
+        for valueset_key, st_set in valueset_refs.items()
         for source_tuple in sorted(st_set))
 
 
+def iter_derived_language_sources(
+    language_refs, valueset_refs, construction_refs, cvalue_refs,
+    languages, constructions, cvalues,
+):
+    """Sources of a language's values and constructions count for the language."""
+    unit_languages = {
+        construction.pk: construction.language_pk
+        for construction in constructions.values()}
+    unitvalue_languages = {
+        cvalue.pk: unit_languages[cvalue.unit_pk]
+        for cvalue in cvalues.values()}
+
+    language_sources = {
+        (languages[language_id].pk, source_tuple.source_pk)
+        for (language_id, _), st_set in valueset_refs.items()
+        for source_tuple in st_set}
+    language_sources.update(
+        (unit_languages[ref.unit_pk], ref.source_pk)
+        for ref in construction_refs)
+    language_sources.update(
+        (unitvalue_languages[ref.unitvalue_pk], ref.source_pk)
+        for ref in cvalue_refs)
+    language_sources.difference_update(
+        (ref.language_pk, ref.source_pk)
+        for ref in language_refs)
+
+    return (
+        models.LanguageReference(
+            language_pk=language_pk,
+            source_pk=source_pk)
+        for language_pk, source_pk in sorted(language_sources))
+
+
+def count_languages(pairs):
+    """Count the distinct languages for each key in `(key, language)` pairs."""
+    languages = {}
+    for key, language in pairs:
+        if key not in languages:
+            languages[key] = set()
+        languages[key].add(language)
+    return {key: len(key_languages) for key, key_languages in languages.items()}
+
+
 def iter_cvalue_examples(cldf_cvalues, cvalues, examples):
     return (
         models.UnitValueSentence(
-            unitvalue=cvalues[cldf_value['id']],
-            sentence=examples[example_id])
+            unitvalue_pk=cvalues[cldf_value['id']].pk,
+            sentence_pk=examples[example_id].pk)
         for cldf_value in cldf_cvalues
         for example_id in sorted(set(cldf_value.get('exampleReference') or ())))
 
@@ -518,9 +669,10 @@ def iter_cvalue_sources(cldf_cvalues, cvalues, sources):
         and source_tuple.source_pk is not None)
 
 
-def make_lvalues(cldf_lvalues, lvaluesets, lcodes, contribution):
+def make_lvalues(
+    cldf_lvalues, valueset_pks, lcodes, contribution, unique_constraint,
+):
     lvalues = {}
-    unique_constraint = set()
     for cldf_value in cldf_lvalues:
         unique_fields = (
             cldf_value['languageReference'],
@@ -531,13 +683,13 @@ def make_lvalues(cldf_lvalues, lvaluesets, lcodes, contribution):
         if unique_fields in unique_constraint:
             continue
         unique_constraint.add(unique_fields)
-        valueset = lvaluesets[
+        valueset_pk = valueset_pks[
             cldf_value['languageReference'],
             cldf_value['parameterReference']]
         code = lcodes.get(cldf_value['codeReference'])
         lvalues[cldf_value['id']] = common.Value(
             id='{}-{}'.format(contribution.id, cldf_value['id']),
-            valueset_pk=valueset.pk,
+            valueset_pk=valueset_pk,
             name=code.name if code and code.name else cldf_value['value'],
             domainelement_pk=code.pk if code else None,
             description=cldf_value.get('comment'))
@@ -554,126 +706,388 @@ def iter_value_examples(cldf_lvalues, lvalues, examples):
         if cldf_value['id'] in lvalues)
 
 
-class CLDFBenchSubmission:
+# CLDF components and custom tables crossgram knows how to import
+TABLES = [
+    'LanguageTable',
+    'ParameterTable',
+    'CodeTable',
+    'ValueTable',
+    'ExampleTable',
+    'constructions.csv',
+    'cvalues.csv',
+]
 
-    def __init__(self, cldf, sources, authors, title, readme):
-        self.title = title
-        self.cldf = cldf
-        self.authors = authors
-        self.sources = sources
-        self.readme = readme
 
-    def add_to_database(
-        self, contribution, all_languages, all_contributors, topics, languoids,
-    ):
-        # read cldf data
-
-        cldf_constructions = list(read_table(self.cldf, 'constructions.csv'))
-        cldf_lvalues = list(read_table(self.cldf, 'ValueTable'))
-        cldf_cvalues = list(read_table(self.cldf, 'cvalues.csv'))
-        cldf_examples = list(read_table(self.cldf, 'ExampleTable'))
-
-        used_languages = {
-            language_id
-            for row in chain(cldf_lvalues, cldf_constructions, cldf_examples)
-            if (language_id := row.get('languageReference'))}
-        cldf_languages = [
-            row
-            for row in read_table(self.cldf, 'LanguageTable')
-            if row['id'] in used_languages]
-
-        if self.cldf.get('ParameterTable'):
-            cldf_parameters = list(read_table(self.cldf, 'ParameterTable'))
-        else:
-            # Automatically build parameter table from value tables.
-            cldf_parameters = cldf_parameters_from_values(
-                cldf_lvalues, cldf_cvalues)
-
-        cldf_codes = make_cldf_codes(read_table(self.cldf, 'CodeTable'))
-
-        # Populate database
-
-        contrib_langs = languages_for_contribution(cldf_languages)
-        languages = only_existing_languages(contrib_langs, all_languages)
-        added_languages = only_nonexisting_languages(
-            cldf_languages, languages, all_languages, languoids)
-        languages.update(added_languages.items())
-        DBSession.add_all(added_languages.values())
-
-        cparameters = make_cparameters(
-            cldf_parameters, cldf_cvalues, contribution)
-        lparameters = make_lparameters(
-            cldf_parameters, cldf_lvalues, contribution, cparameters)
-        DBSession.add_all(cparameters.values())
-        DBSession.add_all(lparameters.values())
-
-        parsed_names = list(map(parse_author, self.authors))
-        contributors = only_existing_contributors(
-            parsed_names, all_contributors)
-        added_contributors = only_nonexisting_contributors(
-            parsed_names, contributors)
-        contributors.update(added_contributors.items())
-        DBSession.add_all(added_contributors.values())
-
-        if self.sources:
-            sources = make_sources(self.sources.records, contribution)
-            DBSession.add_all(sources.values())
-        else:
-            sources = {}
+def record_to_tuple(record):
+    genre = getattr(record.genre, 'value', record.genre)
+    # bypass Record.__getitem__, which joins lists of values into strings
+    fields = list(OrderedDict.items(record))
+    return genre, record.id, fields
+
+
+def tuple_to_record(record_tuple):
+    genre, id_, fields = record_tuple
+    return bibtex.Record(genre, id_, *fields)
+
 
-        DBSession.flush()
+# tables that can get big enough to be worth streaming from disk
+STREAMED_TABLES = {'ValueTable', 'ExampleTable'}
 
-        DBSession.add_all(iter_contribution_languages(
-            cldf_languages, languages, contribution))
-        DBSession.add_all(iter_contribution_contributors(
-            parsed_names, contributors, contribution))
-        DBSession.add_all(iter_language_sources(
-            cldf_languages, languages, sources))
-        DBSession.add_all(iter_parameter_topics(
-            cldf_parameters, lparameters, cparameters, topics))
+# number of rows that get written to the database in one go when streaming
+CHUNK_SIZE = 10000
 
-        constructions = make_constructions(
-            cldf_constructions, languages, contribution)
-        DBSession.add_all(constructions.values())
+# bump this whenever the parsed row data changes shape, so old cache files
+# are ignored
+PARSE_CACHE_VERSION = 2
 
-        code_icons = assign_icons_to_codes(cldf_codes, contribution)
-        lcodes = make_lcodes(cldf_codes, lparameters, code_icons, contribution)
-        ccodes = make_ccodes(cldf_codes, cparameters, code_icons, contribution)
-        DBSession.add_all(lcodes.values())
-        DBSession.add_all(ccodes.values())
 
-        examples = make_examples(cldf_examples, languages, contribution)
-        DBSession.add_all(examples.values())
+def cldf_dir_hash(cldf_dir):
+    """Hash the names and contents of all files in a `cldf/` directory."""
+    hash_ = hashlib.sha256(f'v{PARSE_CACHE_VERSION}'.encode('ascii'))
+    for file_path in sorted(p for p in cldf_dir.rglob('*') if p.is_file()):
+        hash_.update(file_path.relative_to(cldf_dir).as_posix().encode('utf-8'))
+        hash_.update(b'\0')
+        with file_path.open('rb') as f:
+            while (chunk := f.read(1 << 20)):
+                hash_.update(chunk)
+        hash_.update(b'\0')
+    return hash_.hexdigest()
 
-        DBSession.flush()
 
-        DBSession.add_all(iter_example_sources(
-            cldf_examples, examples, sources))
-        DBSession.add_all(iter_construction_sources(
-            cldf_constructions, constructions, sources))
+class StreamedTable:
+    """Table whose rows are read back from disk on every iteration.
 
-        cvalues = make_cvalues(
-            cldf_cvalues, constructions, cparameters, ccodes, contribution)
-        DBSession.add_all(cvalues.values())
+    The rows are stored as a sequence of pickled chunks, so only one chunk
+    at a time needs to be in memory.
+    """
 
-        lvaluesets = make_lvaluesets(
-            cldf_lvalues, languages, lparameters, contribution)
-        DBSession.add_all(lvaluesets.values())
+    def __init__(self, path):
+        self.path = path
 
-        DBSession.flush()
+    def __iter__(self):
+        with self.path.open('rb') as f:
+            while True:
+                try:
+                    chunk = pickle.load(f)
+                except EOFError:
+                    return
+                yield from chunk
 
-        DBSession.add_all(iter_construction_examples(
-            cldf_constructions, cldf_cvalues, constructions, examples))
-        DBSession.add_all(iter_value_sources(cldf_lvalues, lvaluesets, sources))
-        DBSession.add_all(iter_cvalue_examples(cldf_cvalues, cvalues, examples))
-        DBSession.add_all(iter_cvalue_sources(cldf_cvalues, cvalues, sources))
+    @classmethod
+    def write(cls, path, rows):
+        with path.open('wb') as f:
+            for chunk in iter_chunks(rows, CHUNK_SIZE):
+                pickle.dump(chunk, f, pickle.HIGHEST_PROTOCOL)
+        return cls(path)
+
+
+def load_parsed_cldf(cache_path):
+    try:
+        with (cache_path / 'tables.pickle').open('rb') as f:
+            tables, streamed_tables, source_tuples = pickle.load(f)
+    except FileNotFoundError:
+        return None
+    except (OSError, EOFError, pickle.UnpicklingError, ValueError):
+        print('ignoring broken cache file', cache_path, file=sys.stderr)
+        return None
+    tables.update(
+        (table_name, StreamedTable(cache_path / f'{table_name}.pickle'))
+        for table_name in streamed_tables)
+    return tables, source_tuples
+
+
+def store_parsed_cldf(cache_path, cldf_dir):
+    """Parse the data in `cldf_dir` and write it to the cache."""
+    tmp_path = cache_path.parent / f'{cache_path.name}.tmp'
+    if tmp_path.exists():
+        shutil.rmtree(tmp_path)
+    tmp_path.mkdir(parents=True)
+
+    tables, source_tuples = parse_cldf(cldf_dir, tmp_path)
+    streamed_tables = [
+        table_name
+        for table_name, rows in tables.items()
+        if isinstance(rows, StreamedTable)]
+    for table_name in streamed_tables:
+        del tables[table_name]
+    with (tmp_path / 'tables.pickle').open('wb') as f:
+        pickle.dump(
+            (tables, streamed_tables, source_tuples),
+            f, pickle.HIGHEST_PROTOCOL)
+
+    if cache_path.exists():
+        shutil.rmtree(cache_path)
+    tmp_path.replace(cache_path)
+    prune_parse_cache(cache_path)
+    return load_parsed_cldf(cache_path)
+
+
+def prune_parse_cache(cache_path):
+    """Remove everything next to `cache_path`.
+
+    The cache directory of a dataset only holds older versions of it, which
+    would otherwise pile up with every change to the data.
+    """
+    for old_path in cache_path.parent.iterdir():
+        if old_path == cache_path:
+            continue
+        if old_path.is_dir():
+            shutil.rmtree(old_path)
+        else:
+            old_path.unlink()
+
+
+def parse_cldf(cldf_dir, stream_dir=None):
+    """Read all tables and sources crossgram cares about from `cldf_dir`.
+
+    Returns a dict of table rows and a list of bibtex records as tuples.
+    If `stream_dir` is given, big tables are written to files in that
+    directory instead of being kept in memory.
+    """
+    try:
+        cldf_dataset = next(
+            dataset
+            for dataset in iter_datasets(cldf_dir)
+            if dataset.module == 'StructureDataset')
+    except StopIteration:
+        raise ValueError(f'No cldf metadata file found in {cldf_dir.parent}')  # noqa: B904
+
+    tables = {
+        table_name: (
+            StreamedTable.write(
+                stream_dir / f'{table_name}.pickle',
+                read_table(cldf_dataset, table_name))
+            if stream_dir and table_name in STREAMED_TABLES
+            else list(read_table(cldf_dataset, table_name)))
+        for table_name in TABLES
+        if cldf_dataset.get(table_name)}
+
+    bib_path = cldf_dir / 'sources.bib'
+    source_tuples = [
+        record_to_tuple(record)
+        for record in bibtex.Database.from_file(bib_path, lowercase=True).records
+    ] if bib_path.exists() else None
+
+    return tables, source_tuples
 
-        lvalues = make_lvalues(cldf_lvalues, lvaluesets, lcodes, contribution)
-        DBSession.add_all(lvalues.values())
 
-        DBSession.flush()
+class CLDFBenchSubmission:
 
-        DBSession.add_all(iter_value_examples(cldf_lvalues, lvalues, examples))
+    def __init__(self, tables, sources, authors, title, readme):
+        self.title = title
+        self.tables = tables
+        self.authors = authors
+        self.sources = sources
+        self.readme = readme
+
+    def __getstate__(self):
+        # bibtex records can't be pickled, so we send plain tuples across
+        # process boundaries.
+        state = self.__dict__.copy()
+        if self.sources is not None:
+            state['sources'] = [
+                record_to_tuple(record) for record in self.sources.records]
+        return state
+
+    def __setstate__(self, state):
+        if state['sources'] is not None:
+            state['sources'] = bibtex.Database(
+                map(tuple_to_record, state['sources']))
+        self.__dict__.update(state)
+
+    def table(self, table_name):
+        return self.tables.get(table_name) or ()
+
+    def add_to_database(
+        self, contribution, all_languages, all_contributors, topics, languoids,
+        bulk=False,
+    ):
+        # The bulk of the data (examples, values, references, etc.) can
+        # bypass the orm, which is a lot faster.  Everything that goes through
+        # `add_all` must only refer to other rows by primary key, and those
+        # rows must have been flushed already.
+        add_all = bulk_add_all if bulk else DBSession.add_all
+
+        with steps() as step:
+            step('read')
+
+            cldf_constructions = self.table('constructions.csv')
+            cldf_lvalues = self.table('ValueTable')
+            cldf_cvalues = self.table('cvalues.csv')
+            cldf_examples = self.table('ExampleTable')
+
+            used_languages = {
+                language_id
+                for row in chain(cldf_lvalues, cldf_constructions, cldf_examples)
+                if (language_id := row.get('languageReference'))}
+            cldf_languages = [
+                row
+                for row in self.table('LanguageTable')
+                if row['id'] in used_languages]
+
+            if 'ParameterTable' in self.tables:
+                cldf_parameters = self.table('ParameterTable')
+            else:
+                # Automatically build parameter table from value tables.
+                cldf_parameters = cldf_parameters_from_values(
+                    cldf_lvalues, cldf_cvalues)
+
+            cldf_codes = make_cldf_codes(self.table('CodeTable'))
+
+            # Populate database
+
+            step('languages')
+            contrib_langs = languages_for_contribution(cldf_languages)
+            languages = only_existing_languages(contrib_langs, all_languages)
+            added_languages = only_nonexisting_languages(
+                cldf_languages, languages, all_languages, languoids)
+            languages.update(added_languages.items())
+            DBSession.add_all(added_languages.values())
+
+            step('parameters')
+            cparameters = make_cparameters(
+                cldf_parameters, cldf_cvalues, contribution)
+            lparameters = make_lparameters(
+                cldf_parameters, cldf_lvalues, contribution, cparameters)
+            DBSession.add_all(cparameters.values())
+            DBSession.add_all(lparameters.values())
+
+            step('contributors')
+            parsed_names = list(map(parse_author, self.authors))
+            contributors = only_existing_contributors(
+                parsed_names, all_contributors)
+            added_contributors = only_nonexisting_contributors(
+                parsed_names, contributors)
+            contributors.update(added_contributors.items())
+            DBSession.add_all(added_contributors.values())
+
+            step('sources')
+            if self.sources:
+                sources = make_sources(self.sources.records, contribution)
+                DBSession.add_all(sources.values())
+            else:
+                sources = {}
+
+            DBSession.flush()
+
+            step('associations')
+            DBSession.add_all(iter_contribution_languages(
+                cldf_languages, languages, contribution))
+            DBSession.add_all(iter_contribution_contributors(
+                parsed_names, contributors, contribution))
+            language_refs = list(iter_language_sources(
+                cldf_languages, languages, sources))
+            add_all(language_refs)
+            DBSession.add_all(iter_parameter_topics(
+                cldf_parameters, lparameters, cparameters, topics))
+            mark_topics_as_used(cldf_parameters, topics)
+
+            step('constructions')
+            constructions = make_constructions(
+                cldf_constructions, languages, contribution)
+            DBSession.add_all(constructions.values())
+
+            step('codes')
+            code_icons = assign_icons_to_codes(cldf_codes, contribution)
+            lcodes = make_lcodes(cldf_codes, lparameters, code_icons, contribution)
+            ccodes = make_ccodes(cldf_codes, cparameters, code_icons, contribution)
+            DBSession.add_all(lcodes.values())
+            DBSession.add_all(ccodes.values())
+
+            step('examples')
+            # Values and examples can be huge, so they are written in chunks and
+            # only their primary keys are kept around afterwards.
+            examples = {}
+            for chunk_start, chunk in enumerate(
+                iter_chunks(cldf_examples, CHUNK_SIZE)
+            ):
+                chunk_examples = make_examples(
+                    chunk, languages, contribution, chunk_start * CHUNK_SIZE + 1)
+                add_all(chunk_examples.values())
+                DBSession.flush()
+                add_all(iter_example_sources(chunk, chunk_examples, sources))
+                add_all(iter_gloss_tokens(chunk, chunk_examples, contribution))
+                for language_id, count in Counter(
+                    cldf_example['languageReference'] for cldf_example in chunk
+                ).items():
+                    language = languages[language_id]
+                    language.example_count = (language.example_count or 0) + count
+                examples.update(
+                    (example_id, ExampleKey(example.pk, example.number))
+                    for example_id, example in chunk_examples.items())
+
+            step('construction_sources')
+            construction_refs = list(iter_construction_sources(
+                cldf_constructions, constructions, sources))
+            add_all(construction_refs)
+
+            step('cvalues')
+            cvalues = make_cvalues(
+                cldf_cvalues, constructions, cparameters, ccodes, contribution)
+            add_all(cvalues.values())
+
+            step('valuesets')
+            lvaluesets = make_lvaluesets(
+                cldf_lvalues, languages, lparameters, contribution)
+            add_all(lvaluesets.values())
+
+            DBSession.flush()
+
+            valueset_pks = {
+                key: valueset.pk for key, valueset in lvaluesets.items()}
+            del lvaluesets
+
+            step('value_references')
+            add_all(iter_construction_examples(
+                cldf_constructions, cldf_cvalues, constructions, examples))
+            valueset_refs = collect_value_sources(cldf_lvalues, sources)
+            add_all(iter_value_sources(valueset_refs, valueset_pks))
+            add_all(iter_cvalue_examples(cldf_cvalues, cvalues, examples))
+            cvalue_refs = list(iter_cvalue_sources(
+                cldf_cvalues, cvalues, sources))
+            add_all(cvalue_refs)
+
+            step('values')
+            unique_values = set()
+            lcode_languages = set()
+            for chunk in iter_chunks(cldf_lvalues, CHUNK_SIZE):
+                lvalues = make_lvalues(
+                    chunk, valueset_pks, lcodes, contribution, unique_values)
+                add_all(lvalues.values())
+                DBSession.flush()
+                add_all(iter_value_examples(chunk, lvalues, examples))
+                lcode_languages.update(
+                    (cldf_value['codeReference'], cldf_value['languageReference'])
+                    for cldf_value in chunk
+                    if cldf_value['codeReference'] in lcodes)
+
+            # Derived data is computed right here, so we don't have to scan
+            # the whole database for it later.
+            step('language_sources')
+            add_all(iter_derived_language_sources(
+                language_refs, valueset_refs, construction_refs, cvalue_refs,
+                languages, constructions, cvalues))
+
+            step('counts')
+            for parameter_id, count in count_languages(
+                (parameter_id, language_id)
+                for language_id, parameter_id in valueset_pks
+            ).items():
+                lparameters[parameter_id].language_count = count
+            for code_id, count in count_languages(lcode_languages).items():
+                lcodes[code_id].language_count = count
+            for parameter_id, count in count_languages(
+                (cldf_value['parameterReference'],
+                 constructions[cldf_value['Construction_ID']].language_pk)
+                for cldf_value in cldf_cvalues
+            ).items():
+                cparameters[parameter_id].language_count = count
+            for code_id, count in count_languages(
+                (ccode_id, constructions[cldf_value['Construction_ID']].language_pk)
+                for cldf_value in cldf_cvalues
+                if (ccode_id := cldf_value.get('codeReference')) in ccodes
+            ).items():
+                ccodes[code_id].language_count = count
 
         families = {
             language.id: family
@@ -684,7 +1098,19 @@ class CLDFBenchSubmission:
         return added_languages.values(), added_contributors.values(), families
 
     @classmethod
-    def load(cls, path, contrib_md):
+    def load(cls, path, contrib_md, parse_cache_dir=None):
+        """Parse a cldfbench dataset into plain row data.
+
+        The result can be pickled, so datasets can be loaded in parallel by
+        a pool of worker processes.
+
+        If `parse_cache_dir` is given, the parsed rows and sources are stored
+        there, keyed by a hash of the `cldf/` directory, and re-used as long
+        as the data does not change.  Values and examples are then streamed
+        from the cache instead of being kept in memory.  The directory must
+        only be used for this dataset, since older versions of the data in
+        it are deleted.
+        """
         # zenodo download dumps all files into a subfolder
         if not (path / 'cldf').exists():
             for subpath in path.glob('*'):
@@ -693,16 +1119,18 @@ class CLDFBenchSubmission:
                     break
         assert path.exists(), str(path)
 
-        try:
-            cldf_dataset = next(
-                dataset
-                for dataset in iter_datasets(path / 'cldf')
-                if dataset.module == 'StructureDataset')
-        except StopIteration:
-            raise ValueError(f'No cldf metadata file found in {path}')  # noqa: B904
+        cldf_dir = path / 'cldf'
+        if parse_cache_dir:
+            cache_path = parse_cache_dir / cldf_dir_hash(cldf_dir)
+            tables, source_tuples = (
+                load_parsed_cldf(cache_path)
+                or store_parsed_cldf(cache_path, cldf_dir))
+        else:
+            tables, source_tuples = parse_cldf(cldf_dir)
 
-        bib_path = path / 'cldf' / 'sources.bib'
-        sources = bibtex.Database.from_file(bib_path, lowercase=True) if bib_path.exists() else None
+        sources = bibtex.Database(
+            map(tuple_to_record, source_tuples)
+        ) if source_tuples is not None else None
 
         md_path = path / 'metadata.json'
         metadata = jsonlib.load(md_path) if md_path.exists() else {}
@@ -718,4 +1146,4 @@ class CLDFBenchSubmission:
         authors = contrib_md.get('authors') or ()
 
         return cls(
-            cldf_dataset, sources, authors, metadata.get('title'), readme)
+            tables, sources, authors, metadata.get('title'), readme)
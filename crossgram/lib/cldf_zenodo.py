@@ -1,11 +1,91 @@
 # FIXME(johannes): remove this entire module, once the actual cldf-zenodo
 # package is published
 
+import json
 import pathlib
+import time
 
+import cldfzenodo
 from pycldf.ext.discovery import get_dataset
 
+# zenodo records of a specific version don't really change, so there is no
+# need to ask very often
+DEFAULT_RECORD_TTL = 30 * 24 * 60 * 60
+
 
 def download_from_doi(doi, outdir=pathlib.Path('.')):
     _ = get_dataset(f'https://doi.org/{doi}', outdir)
     return outdir
+
+
+class ZenodoRecordCache:
+    """Metadata of Zenodo records, stored in a json file.
+
+    Records are only looked up online if they aren't in the cache yet or if
+    the cached metadata is older than `ttl` seconds.  In `offline` mode,
+    cached metadata is used no matter how old it is and unknown records are
+    not looked up at all.  If Zenodo can't be reached, outdated metadata is
+    used, too.
+    """
+
+    def __init__(
+        self, path, ttl=DEFAULT_RECORD_TTL, offline=False, api=cldfzenodo.API,
+    ):
+        self.path = path
+        self.ttl = ttl
+        self.offline = offline
+        self.api = api
+        try:
+            with path.open(encoding='utf-8') as f:
+                self.records = json.load(f)
+        except FileNotFoundError:
+            self.records = {}
+        except ValueError:
+            print('ignoring broken zenodo record cache', str(path))
+            self.records = {}
+
+    def _save(self):
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.parent / f'{self.path.name}.tmp'
+        with tmp_path.open('w', encoding='utf-8') as f:
+            json.dump(self.records, f, indent=2, sort_keys=True)
+        tmp_path.replace(self.path)
+
+    def get(self, doi):
+        """Return a dict with the version, title and concept doi of a record.
+
+        Returns `None` if the record is unknown and can't be looked up.
+        """
+        cached = self.records.get(doi)
+        if cached and (
+            self.offline or time.time() - cached['retrieved'] < self.ttl
+        ):
+            return cached
+        if self.offline:
+            print('offline mode: no cached zenodo record for doi', doi)
+            return None
+
+        try:
+            record = self.api.get_record(doi=doi)
+        except OSError as error:
+            # urllib's errors, e.g. timeouts or no network at all
+            if not cached:
+                raise
+            print(
+                'warning: could not refresh zenodo record for doi', doi,
+                f'({error}), using cached metadata')
+            return cached
+        if record is None:
+            raise ValueError(f'no zenodo record found for doi {doi}')
+        self.records[doi] = {
+            'retrieved': time.time(),
+            'version': record.version,
+            'title': record.title,
+            'concept_doi': record.concept_doi,
+        }
+        self._save()
+        return self.records[doi]
+
+    def version(self, doi):
+        record = self.get(doi)
+        return record['version'] if record else None
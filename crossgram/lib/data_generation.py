@@ -0,0 +1,114 @@
+"""Process-wide caches for things that only change when the data changes.
+
+Every time `initializedb` changes the data, it writes a new *data
+generation* stamp to the `config` table.  A `GenerationCache` remembers which
+generation its contents belong to and empties itself as soon as the stamp
+changes.  The app only looks the stamp up every few seconds, so after a
+rebuild caches may be stale for at most `CHECK_INTERVAL` seconds.
+"""
+
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from datetime import datetime
+
+from clld.db.meta import DBSession
+from clld.db.models import common
+
+
+GENERATION_KEY = '__crossgram_data_generation__'
+CHECK_INTERVAL = 10
+
+_lock = threading.Lock()
+_generation = None
+_checked_at = None
+
+
+def new_data_generation():
+    """Mark the data as changed, which invalidates all caches."""
+    stamp = '{}-{}'.format(
+        datetime.now().isoformat(timespec='seconds'), uuid.uuid4().hex[:8])
+    DBSession.query(common.Config) \
+        .filter(common.Config.key == GENERATION_KEY) \
+        .delete()
+    DBSession.add(common.Config(key=GENERATION_KEY, value=stamp))
+    return stamp
+
+
+def data_generation():
+    """Return the current data generation stamp (or `None`)."""
+    global _generation, _checked_at
+    now = time.monotonic()
+    with _lock:
+        if _checked_at is not None and now - _checked_at < CHECK_INTERVAL:
+            return _generation
+    generation = DBSession.query(common.Config.value) \
+        .filter(common.Config.key == GENERATION_KEY) \
+        .scalar()
+    with _lock:
+        _generation, _checked_at = generation, now
+    return generation
+
+
+# `None` is a valid generation (databases built before the stamp existed)
+_UNSET = object()
+
+
+class GenerationCache:
+    """Dictionary which is emptied whenever the data generation changes.
+
+    If `maxsize` is given, the least recently used entries are dropped once
+    the cache gets bigger than that.
+    """
+
+    def __init__(self, maxsize=None):
+        self.maxsize = maxsize
+        self._lock = threading.Lock()
+        self._generation = _UNSET
+        self._data = OrderedDict()
+
+    def _check_generation(self, generation):
+        # needs `self._lock`
+        if generation != self._generation:
+            self._data = OrderedDict()
+            self._generation = generation
+
+    def lookup(self, key, default=None):
+        generation = data_generation()
+        with self._lock:
+            self._check_generation(generation)
+            if key not in self._data:
+                return default
+            self._data.move_to_end(key)
+            return self._data[key]
+
+    def store(self, key, value, generation=_UNSET):
+        fresh = generation is _UNSET
+        if fresh:
+            generation = data_generation()
+        with self._lock:
+            if fresh:
+                self._check_generation(generation)
+            elif generation != self._generation:
+                # the data changed while the value was being computed
+                return
+            self._data[key] = value
+            self._data.move_to_end(key)
+            if self.maxsize is not None:
+                while len(self._data) > self.maxsize:
+                    self._data.popitem(last=False)
+
+    def get(self, key, compute):
+        """Return the value for `key`, calling `compute()` if needed."""
+        generation = data_generation()
+        value = self.lookup(key, _UNSET)
+        if value is _UNSET:
+            value = compute()
+            self.store(key, value, generation)
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._data = OrderedDict()
+            self._generation = _UNSET
@@ -0,0 +1,132 @@
+"""Loading the related objects the columns of a data table need.
+
+Most data tables show things that hang off their rows -- the sources of a
+value, the examples of a construction, etc.  Each data table lists the
+relationships its columns follow in `prefetch_paths()` and picks a strategy
+for loading them in `__prefetch_strategy__`:
+
+* `'joined'`: `LEFT OUTER JOIN`s everything into the query of the page.  One
+  query, but every joined collection multiplies the rows the database sends
+  (values × references × sentences), and SQLAlchemy has to wrap the paged
+  query in a subquery to keep `LIMIT` working.
+* `'selectin'`: one more query per relationship, selecting the related
+  objects of the whole page by primary key (`WHERE ... IN (...)`).
+* `'batched'`: like `'selectin'`, but the related objects are loaded by
+  `batched_load` after the page has been fetched, with a single query per
+  relationship that doesn't join the parent table again.
+
+`crossgram.scripts.benchmark_eager_loading` shows how many rows and how much
+time each strategy costs for a table.
+"""
+
+from clld.db.meta import DBSession
+from sqlalchemy import inspect
+from sqlalchemy.orm import joinedload, selectinload
+from sqlalchemy.orm.attributes import set_committed_value
+
+
+STRATEGIES = ('joined', 'selectin', 'batched')
+
+LOADERS = {'joined': joinedload, 'selectin': selectinload}
+
+
+def loader_option(path, strategy):
+    """Return the query option loading a relationship path eagerly."""
+    loader = LOADERS[strategy]
+    option = loader(path[0])
+    for attribute in path[1:]:
+        option = getattr(option, loader.__name__)(attribute)
+    return option
+
+
+def _unique(objects):
+    seen = set()
+    for obj in objects:
+        if obj is not None and id(obj) not in seen:
+            seen.add(id(obj))
+            yield obj
+
+
+def _load_relationship(objects, attribute):
+    """Load a relationship of several objects at once.
+
+    Return the related objects (of all of them).
+    """
+    prop = attribute.property
+    if prop.secondary is not None or len(prop.local_remote_pairs) != 1:
+        raise ValueError(f'cannot batch-load {attribute}')
+    ((local_col, remote_col),) = prop.local_remote_pairs
+    local_key = prop.parent.get_property_by_column(local_col).key
+    remote_key = prop.mapper.get_property_by_column(remote_col).key
+
+    pending = [
+        obj
+        for obj in objects
+        if prop.key not in inspect(obj).dict]
+    keys = {getattr(obj, local_key) for obj in pending} - {None}
+    related = {}
+    if keys:
+        query = DBSession.query(prop.mapper) \
+            .filter(getattr(prop.mapper.class_, remote_key).in_(keys))
+        if prop.order_by:
+            query = query.order_by(*prop.order_by)
+        for obj in query:
+            related.setdefault(getattr(obj, remote_key), []).append(obj)
+
+    for obj in pending:
+        values = related.get(getattr(obj, local_key), [])
+        if prop.uselist:
+            set_committed_value(obj, prop.key, values)
+        else:
+            set_committed_value(obj, prop.key, values[0] if values else None)
+
+    result = []
+    for obj in objects:
+        value = getattr(obj, prop.key)
+        if prop.uselist:
+            result.extend(value)
+        else:
+            result.append(value)
+    return list(_unique(result))
+
+
+def batched_load(objects, path):
+    """Load a relationship path for a list of objects.
+
+    Runs one query per relationship in the path, no matter how many objects
+    there are.
+    """
+    objects = list(_unique(objects))
+    for attribute in path:
+        if not objects:
+            break
+        objects = _load_relationship(objects, attribute)
+
+
+class EagerLoadingMixin:
+    """Data table which loads related objects as declared (see above)."""
+
+    __prefetch_strategy__ = 'selectin'
+
+    def prefetch_paths(self):
+        """Return the relationship paths the columns need.
+
+        e.g. `[(Value.sentence_assocs, ValueSentence.sentence)]`
+        """
+        return []
+
+    def prefetch_options(self):
+        """Return the query options for `base_query`."""
+        if self.__prefetch_strategy__ == 'batched':
+            return []
+        return [
+            loader_option(path, self.__prefetch_strategy__)
+            for path in self.prefetch_paths()]
+
+    def get_query(self, *args, **kwargs):
+        items = super().get_query(*args, **kwargs)
+        if self.__prefetch_strategy__ == 'batched':
+            items = list(items)
+            for path in self.prefetch_paths():
+                batched_load(items, path)
+        return items
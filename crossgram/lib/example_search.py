@@ -0,0 +1,101 @@
+"""Ranked full-text search over the examples of all contributions.
+
+Every example gets a `tsvector` made up of its translation and comment
+(stemmed as English) and its primary text, analysed text and gloss (not
+stemmed, since those aren't English).  The fields are weighted, so that hits
+in the translation rank highest:
+
+    A: translation
+    B: primary text, analysed text
+    C: gloss
+    D: comment
+
+Queries use the `websearch_to_tsquery` syntax (`"exact phrase"`, `or`,
+`-excluded`) and are matched both stemmed and unstemmed, so they find words
+in either kind of field.
+"""
+
+from collections import namedtuple
+
+import sqlalchemy
+from sqlalchemy.orm import joinedload
+
+from clld.db.meta import DBSession
+from clld.db.models import common
+
+from crossgram import models
+
+
+PAGE_SIZE = 20
+
+SearchResults = namedtuple('SearchResults', 'total examples')
+
+UPDATE_SEARCH_VECTORS = """
+    UPDATE example
+    SET search_vector =
+        setweight(to_tsvector('english', coalesce(s.description, '')), 'A')
+        || setweight(to_tsvector('simple', coalesce(s.name, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(s.analyzed, '')), 'B')
+        || setweight(to_tsvector('simple', coalesce(s.gloss, '')), 'C')
+        || setweight(to_tsvector('english', coalesce(s.comment, '')), 'D')
+    FROM sentence AS s
+    WHERE s.pk = example.pk
+"""
+
+TSQUERY = """
+    websearch_to_tsquery('english', :query)
+    || websearch_to_tsquery('simple', :query)
+"""
+
+
+def update_search_vectors(contribution_pk=None):
+    """Compute the search vectors of all examples (of one contribution)."""
+    if contribution_pk is None:
+        DBSession.execute(sqlalchemy.text(UPDATE_SEARCH_VECTORS))
+    else:
+        DBSession.execute(
+            sqlalchemy.text(
+                UPDATE_SEARCH_VECTORS
+                + ' AND example.contribution_pk = :contribution_pk'),
+            {'contribution_pk': contribution_pk})
+    DBSession.execute(sqlalchemy.text('ANALYZE example'))
+
+
+def search_examples(query, page=1, page_size=PAGE_SIZE):
+    """Return one page of examples matching `query`, best matches first.
+
+    The examples come with their rank in `example.search_rank`.
+    """
+    params = {
+        'query': query,
+        'limit': page_size,
+        'offset': (max(page, 1) - 1) * page_size}
+    total = DBSession.execute(
+        sqlalchemy.text(f"""
+            SELECT count(*)
+            FROM example
+            WHERE search_vector @@ ({TSQUERY})
+        """),
+        params).scalar()
+    if not total:
+        return SearchResults(0, [])
+
+    ranks = DBSession.execute(
+        sqlalchemy.text(f"""
+            SELECT example.pk, ts_rank_cd(search_vector, tsq.q) AS rank
+            FROM example, (SELECT {TSQUERY} AS q) AS tsq
+            WHERE search_vector @@ tsq.q
+            ORDER BY rank DESC, example.pk
+            LIMIT :limit OFFSET :offset
+        """),
+        params).all()
+    examples = {
+        example.pk: example
+        for example in DBSession.query(models.Example)
+        .filter(models.Example.pk.in_([pk for pk, _ in ranks]))
+        .options(
+            joinedload(models.Example.contribution),
+            joinedload(common.Sentence.language))}
+    for pk, rank in ranks:
+        examples[pk].search_rank = rank
+    return SearchResults(total, [examples[pk] for pk, _ in ranks])
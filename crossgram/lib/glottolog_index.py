@@ -0,0 +1,134 @@
+"""Compact on-disk index of the Glottolog languoids crossgram cares about.
+
+Walking the whole Glottolog repository with `pyglottolog` takes minutes, but
+the import only ever needs a handful of fields per languoid.  This module
+keeps those fields in an SQLite file, which is rebuilt whenever the HEAD
+commit of the Glottolog clone changes.
+"""
+
+import json
+import sqlite3
+from collections import namedtuple
+
+import git
+from clldutils.misc import slug
+
+
+Languoid = namedtuple(
+    'Languoid',
+    'id name latitude longitude macroareas level iso family_id')
+
+
+def _commit(glottolog_path):
+    try:
+        return git.Repo(str(glottolog_path)).head.commit.hexsha
+    except (git.InvalidGitRepositoryError, git.NoSuchPathError, ValueError):
+        # can't tell if the data changed, so better rebuild every time
+        return None
+
+
+def _row(languoid):
+    return (
+        languoid.id,
+        languoid.name,
+        slug(languoid.name),
+        languoid.latitude,
+        languoid.longitude,
+        json.dumps([macroarea.name for macroarea in languoid.macroareas]),
+        getattr(languoid.level, 'id', languoid.level),
+        languoid.iso,
+        languoid.lineage[0][1] if languoid.lineage else None)
+
+
+class GlottologIndex:
+    """Dict-like read access to the languoid index.
+
+    Languoids can be looked up by glottocode or by the slug of their name.
+    """
+
+    def __init__(self, index_path):
+        self._db = sqlite3.connect(str(index_path))
+        self._db.execute('PRAGMA mmap_size = 268435456')
+
+    def _query_one(self, where, value):
+        row = self._db.execute(
+            'SELECT id, name, latitude, longitude, macroareas, level, iso,'
+            f' family_id FROM languoid WHERE {where}',
+            (value,)).fetchone()
+        if row is None:
+            return None
+        id_, name, lat, lon, macroareas, level, iso, family_id = row
+        return Languoid(
+            id_, name, lat, lon, tuple(json.loads(macroareas)), level, iso,
+            family_id)
+
+    def get(self, glottocode, default=None):
+        if not glottocode:
+            return default
+        return self._query_one('id = ?', glottocode) or default
+
+    def get_by_name(self, name_slug, default=None):
+        # if several languoids share a name, the last one wins (same as
+        # building a `{slug(name): languoid}` dict)
+        return self._query_one(
+            'slug = ? ORDER BY rowid DESC LIMIT 1', name_slug) or default
+
+    def __contains__(self, glottocode):
+        return self.get(glottocode) is not None
+
+    def __len__(self):
+        return self._db.execute('SELECT count(*) FROM languoid').fetchone()[0]
+
+    def commit(self):
+        row = self._db.execute(
+            "SELECT value FROM meta WHERE key = 'commit'").fetchone()
+        return row[0] if row else None
+
+    def close(self):
+        self._db.close()
+
+    @classmethod
+    def build(cls, index_path, languoids, commit=None):
+        """Write a new index file for an iterable of pyglottolog languoids."""
+        tmp_path = index_path.parent / f'{index_path.name}.tmp'
+        if tmp_path.exists():
+            tmp_path.unlink()
+        db = sqlite3.connect(str(tmp_path))
+        with db:
+            db.execute("""
+                CREATE TABLE languoid (
+                    id TEXT PRIMARY KEY,
+                    name TEXT,
+                    slug TEXT,
+                    latitude REAL,
+                    longitude REAL,
+                    macroareas TEXT,
+                    level TEXT,
+                    iso TEXT,
+                    family_id TEXT)
+            """)
+            db.execute('CREATE TABLE meta (key TEXT PRIMARY KEY, value TEXT)')
+            db.executemany(
+                'INSERT INTO languoid VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)',
+                map(_row, languoids))
+            db.execute('CREATE INDEX languoid_slug ON languoid (slug)')
+            db.execute(
+                "INSERT INTO meta VALUES ('commit', ?)", (commit,))
+        db.close()
+        tmp_path.replace(index_path)
+        return cls(index_path)
+
+    @classmethod
+    def from_glottolog(cls, index_path, glottolog):
+        """Open the index, rebuilding it if the Glottolog clone has changed."""
+        commit = _commit(glottolog.repos)
+        if commit and index_path.exists():
+            index = cls(index_path)
+            try:
+                if index.commit() == commit:
+                    return index
+            except sqlite3.DatabaseError:
+                pass
+            index.close()
+        print('Building glottolog index (this takes a while)...')
+        return cls.build(index_path, glottolog.languoids(), commit)
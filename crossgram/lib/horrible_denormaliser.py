@@ -34,6 +34,11 @@ anything).
 And on the other end the data table contains `BlockDecoder` objects, which
 parse the information back out of the string (or provide regex's/SQL LIKE
 queries that the data tables can chuck at sqlalchemy).
+
+Update: regexes can't use an index, so sorting and searching by language name
+now joins `ContributionLanguage.language_name` after all (see
+`crossgram.datatables.join_language_names`).  The denormalised names are
+still used to display them.
 """
 
 import re
@@ -0,0 +1,88 @@
+"""Map markers that don't need the database.
+
+The icon of a code is stored in the `jsondata` of its domain element, so
+looking it up for every feature of a map loads the domain element of every
+value.  Instead, the icons of all domain elements are read in one query per
+data generation.  The SVG data urls only depend on the icons, so each of them
+is made once per process:
+
+* a value set with a single code gets the icon of that code
+* a value set with several codes gets a pie chart with a slice in the colour
+  of each code, sized by the number of values with that code
+"""
+
+import functools
+from collections import Counter
+
+from clld.db.meta import DBSession
+from clld.db.models import common
+from clld.web.icon import Icon
+from clldutils import svg
+
+from crossgram.lib.data_generation import GenerationCache
+
+
+# same size as the svg of a normal icon
+PIE_WIDTH = 40
+
+DOMAINELEMENT_ICONS = GenerationCache()
+
+
+def _load_domainelement_icons():
+    return {
+        pk: jsondata['icon']
+        for pk, jsondata in DBSession.query(
+            common.DomainElement.pk, common.DomainElement.jsondata)
+        if jsondata and jsondata.get('icon')}
+
+
+def domainelement_icons():
+    """Return a dictionary mapping domain element pks to icon names."""
+    return DOMAINELEMENT_ICONS.get('icons', _load_domainelement_icons)
+
+
+def value_icon(value):
+    """Return the icon name of the code of a value (or `None`)."""
+    if value.domainelement_pk is None:
+        return None
+    icon = domainelement_icons().get(value.domainelement_pk)
+    if icon is None:
+        # the domain element is newer than the data generation
+        icon = value.domainelement.jsondata.get('icon')
+    return icon
+
+
+def valueset_icons(valueset):
+    """Return `(icon name, number of values)` pairs for a value set."""
+    # `Counter` keeps the icons in the order of the values
+    return tuple(Counter(
+        icon
+        for value in valueset.values
+        if (icon := value_icon(value))).items())
+
+
+@functools.lru_cache(maxsize=None)
+def icon_url(icon):
+    # `Icon.url` doesn't actually use the request
+    return Icon(icon).url(None)
+
+
+@functools.lru_cache(maxsize=10000)
+def pie_url(icons):
+    """Return the url of a pie chart for `(icon name, count)` pairs."""
+    return svg.data_url(svg.pie(
+        [count for _, count in icons],
+        [icon[1:7] for icon, _ in icons],
+        width=PIE_WIDTH,
+        stroke_circle=True))
+
+
+def valueset_marker_url(valueset):
+    """Return the url of the map marker for a value set (or `None`)."""
+    icons = valueset_icons(valueset)
+    if not icons:
+        return None
+    elif len(icons) == 1:
+        return icon_url(icons[0][0])
+    else:
+        return pie_url(icons)
@@ -0,0 +1,215 @@
+"""Paging through big data tables without `OFFSET` and `count(*)`.
+
+clld's data tables skip to a page with `OFFSET` and count all rows, with and
+without filters, for every single page.  All of that gets slower the bigger
+the table and the further back the page.  `SeekPagingMixin` replaces
+`DataTable.get_query` of a data table:
+
+* The total number of rows only depends on the table's constraints, so it is
+  computed once per data generation.
+* With filters, the query planner's row estimate is shown instead of an
+  exact count, unless the estimate is small enough to count quickly.
+* The sort key of the last row of each page is remembered, so the next page
+  can start right after it (keyset pagination) instead of skipping over all
+  rows before it.  Jumping to a page nobody has paged to falls back to
+  `OFFSET`.
+
+Estimates and keyset pagination need PostgreSQL; with other databases the
+tables count and page like any other clld data table.
+"""
+
+from clld.db.meta import DBSession
+from clld.web.datatables.base import DISPLAY_LENGTH, DISPLAY_LIMIT, type_coerce
+from sqlalchemy import and_, or_
+from sqlalchemy.orm import undefer
+
+from crossgram.lib.data_generation import GenerationCache, data_generation
+
+
+# below this many (estimated) rows, counting exactly is cheap enough
+EXACT_COUNT_LIMIT = 10000
+
+TABLE_COUNTS = GenerationCache()
+CURSORS = GenerationCache(maxsize=10000)
+
+
+def constraint_pks(datatable):
+    """Return the pks of the objects a data table is constrained to."""
+    return tuple(
+        getattr(
+            getattr(datatable, datatable.attr_from_constraint(model)),
+            'pk', None)
+        for model in datatable.__constraints__)
+
+
+def is_postgres():
+    return DBSession.get_bind().dialect.name == 'postgresql'
+
+
+def estimate_count(query):
+    """Count the rows of a query, or estimate the count if there are many."""
+    if not is_postgres():
+        return query.count()
+    statement = query.enable_eagerloads(False).statement.compile(
+        dialect=DBSession.get_bind().dialect,
+        compile_kwargs={'render_postcompile': True})
+    plan = DBSession.connection().exec_driver_sql(
+        f'EXPLAIN (FORMAT JSON) {statement}', statement.params).scalar()
+    estimate = int(plan[0]['Plan']['Plan Rows'])
+    if estimate <= EXACT_COUNT_LIMIT:
+        return query.count()
+    return estimate
+
+
+def seek_condition(ordering, cursor):
+    """Match the rows that come after `cursor` in the given order.
+
+    `ordering` is a list of `(expression, descending)` pairs and `cursor`
+    has the values of these expressions for the last row of a page.  Null
+    values sort last in ascending order, like PostgreSQL does by default.
+    """
+    clauses = []
+    for index, ((expression, descending), value) in enumerate(
+        zip(ordering, cursor)
+    ):
+        if descending:
+            after = expression < value
+        else:
+            after = or_(expression > value, expression.is_(None))
+        clauses.append(and_(
+            *(
+                expr == val
+                for (expr, _), val in zip(ordering[:index], cursor[:index])),
+            after))
+    return or_(*clauses)
+
+
+def order_by_clauses(ordering):
+    """Turn `(expression, descending)` pairs into `ORDER BY` clauses.
+
+    Null values go where `seek_condition` expects them (PostgreSQL's
+    default), whatever the database.
+    """
+    return [
+        expression.desc().nulls_first()
+        if descending
+        else expression.asc().nulls_last()
+        for expression, descending in ordering]
+
+
+def seek_page(query, ordering, limit, offset=0, cursor=None):
+    """Return the items of a page and the cursor for the page after it.
+
+    Starts right after `cursor` if there is one, or skips `offset` rows
+    otherwise.  The next cursor is `None` if seeking from the last row of
+    the page isn't possible.
+    """
+    query = query.order_by(*order_by_clauses(ordering))
+    # the values of the sort expressions come back after the item
+    query = query.add_columns(*(order for order, _ in ordering))
+    if cursor is not None:
+        query = query.filter(seek_condition(ordering, cursor))
+    else:
+        query = query.offset(offset)
+    rows = query.limit(limit).all()
+
+    next_cursor = tuple(rows[-1][1:]) if rows else None
+    # `x > NULL` is never true, so don't even try to seek from there
+    if next_cursor is not None \
+            and any(value is None for value in next_cursor):
+        next_cursor = None
+    return [row[0] for row in rows], next_cursor
+
+
+class SeekPagingMixin:
+    """Data table with cheap counts and keyset pagination (see above)."""
+
+    def _filter(self, query):
+        # same as in `DataTable.get_query`
+        filters = []
+        for name, val in self.req.params.items():
+            if val and name.startswith('sSearch_'):
+                try:
+                    colindex = int(name.split('_')[1])
+                    col = self.cols[colindex]
+                    clauses = col.search(val)
+                except (ValueError, IndexError):  # pragma: no cover
+                    clauses = None
+                if clauses is not None:
+                    if not isinstance(clauses, (tuple, list)):
+                        clauses = [clauses]
+                    for clause in clauses:
+                        if clause is not None:
+                            query = query.filter(clause)
+                            filters.append((colindex, col.js_args['sTitle'], val))
+        for colindex, coltitle, qs in sorted(set(filters)):
+            self.filters.append((coltitle, qs))
+        return query, tuple(sorted(set(filters)))
+
+    def _ordering(self):
+        # same as in `DataTable.get_query`, but as (expression, desc) pairs
+        ordering = []
+        sort_key = []
+        sorting_cols = type_coerce(int, self.req.params.get('iSortingCols', 0), 0)
+        for index in range(min(sorting_cols, 10)):
+            try:
+                col = self.cols[int(self.req.params.get('iSortCol_%s' % index))]
+            except (TypeError, ValueError, IndexError):  # pragma: no cover
+                continue
+            if col.js_args.get('bSortable', True):
+                orders = col.order()
+                if orders is not None:
+                    if not isinstance(orders, (tuple, list)):
+                        orders = [orders]
+                    descending = \
+                        self.req.params.get('sSortDir_%s' % index) == 'desc'
+                    ordering.extend((order, descending) for order in orders)
+                    sort_key.append((col.name, descending))
+
+        default_order = self.default_order()
+        if not isinstance(default_order, (list, tuple)):
+            default_order = [default_order]
+        ordering.extend((order, False) for order in default_order)
+        # the primary key makes the order unique, which seeking needs
+        pk = self.db_model().pk
+        if not any(order is pk for order, _ in ordering):
+            ordering.append((pk, False))
+        return ordering, tuple(sort_key)
+
+    def get_query(self, limit=DISPLAY_LIMIT, offset=0, undefer_cols=()):
+        model = self.db_model()
+        query = self.base_query(
+            DBSession.query(model).filter(model.active == True))  # noqa: E712
+        table_key = (type(self).__name__, constraint_pks(self))
+        self.count_all = TABLE_COUNTS.get(table_key, query.count)
+
+        query, filter_key = self._filter(query)
+        if filter_key:
+            self.count_filtered = estimate_count(query)
+        else:
+            self.count_filtered = self.count_all
+
+        ordering, sort_key = self._ordering()
+        if undefer_cols:
+            query = query.options(*(undefer(c) for c in undefer_cols))
+
+        if 'iDisplayLength' in self.req.params:
+            limit = type_coerce(
+                int, self.req.params['iDisplayLength'], DISPLAY_LENGTH)
+            # make sure no more than DISPLAY_LIMIT items can be selected
+            limit = min(limit, DISPLAY_LIMIT)
+        if limit == -1:
+            limit = DISPLAY_LIMIT
+        offset = type_coerce(
+            int, self.req.params.get('iDisplayStart', offset), offset)
+
+        seek = is_postgres()
+        cursor_key = (table_key, filter_key, sort_key, limit)
+        # a cursor from data that changed meanwhile must not be remembered
+        generation = data_generation()
+        cursor = CURSORS.lookup(cursor_key + (offset,)) if seek else None
+        items, next_cursor = seek_page(query, ordering, limit, offset, cursor)
+        if seek and next_cursor is not None:
+            CURSORS.store(
+                cursor_key + (offset + limit,), next_cursor, generation)
+        return items
@@ -0,0 +1,197 @@
+"""Find out where the time goes when building the database.
+
+An `IngestProfile` records wall time, cpu time, peak memory, the number of
+rows created per model class and the number of session flushes for a tree
+of named phases, and writes everything to a json file at the end:
+
+    with ingest_profile(path):
+        with phase('download'):
+            ...
+        with steps() as step:
+            step('languages')
+            ...
+            step('values')
+            ...
+
+`phase`, `steps` and `count_rows` do nothing if no profile is active, so
+code can be instrumented unconditionally.
+"""
+
+import json
+import time
+from collections import Counter
+from contextlib import contextmanager
+from datetime import datetime
+
+try:
+    import resource
+except ImportError:  # pragma: no cover
+    resource = None
+
+from sqlalchemy import event
+
+from clld.db.meta import DBSession
+
+
+_active_profile = None
+
+
+def _peak_memory():
+    # `ru_maxrss` is in kilobytes on Linux (and in bytes on macOS)
+    if resource is None:  # pragma: no cover
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _children_cpu_time():
+    # cpu time of worker processes only shows up once they have terminated
+    if resource is None:  # pragma: no cover
+        return 0.0
+    usage = resource.getrusage(resource.RUSAGE_CHILDREN)
+    return usage.ru_utime + usage.ru_stime
+
+
+class IngestProfile:
+
+    def __init__(self):
+        self.rows = Counter()
+        self.flushes = 0
+        self.bulk_inserts = 0
+        self.started = datetime.now()
+        self.root = self._start_phase('total', {})
+        self._stack = [self.root]
+
+    def _start_phase(self, name, info):
+        return {
+            'name': name,
+            **info,
+            '_start': (
+                time.perf_counter(),
+                time.process_time(),
+                _children_cpu_time(),
+                Counter(self.rows),
+                self.flushes,
+                self.bulk_inserts),
+            'phases': []}
+
+    def _finish_phase(self, phase_):
+        wall, cpu, children_cpu, rows, flushes, bulk_inserts = \
+            phase_.pop('_start')
+        phase_['wall_time'] = time.perf_counter() - wall
+        phase_['cpu_time'] = time.process_time() - cpu
+        phase_['children_cpu_time'] = _children_cpu_time() - children_cpu
+        phase_['peak_memory_kb'] = _peak_memory()
+        phase_['flushes'] = self.flushes - flushes
+        phase_['bulk_inserts'] = self.bulk_inserts - bulk_inserts
+        phase_['rows'] = dict(sorted((self.rows - rows).items()))
+        # keep the nested phases at the end, so the json is easier to read
+        phase_['phases'] = phase_.pop('phases')
+
+    def push(self, name, info):
+        phase_ = self._start_phase(name, info)
+        self._stack[-1]['phases'].append(phase_)
+        self._stack.append(phase_)
+
+    def pop(self):
+        self._finish_phase(self._stack.pop())
+
+    def finish(self):
+        while self._stack:
+            self.pop()
+
+    def count_flush(self, session, flush_context):
+        self.flushes += 1
+
+    def count_new_object(self, session, instance):
+        # objects are counted when they are added to the session, so they
+        # show up in the phase that created them, not the one that flushed
+        self.rows[type(instance).__name__] += 1
+
+    def to_json(self):
+        return {
+            'started': self.started.isoformat(timespec='seconds'),
+            **self.root}
+
+    def write(self, path):
+        path.parent.mkdir(parents=True, exist_ok=True)
+        with path.open('w', encoding='utf-8') as f:
+            json.dump(self.to_json(), f, indent=2)
+
+
+@contextmanager
+def ingest_profile(path=None):
+    """Profile everything that happens inside the `with` block.
+
+    If `path` is given, the profile is written there as json at the end.
+    """
+    global _active_profile
+    profile = IngestProfile()
+    _active_profile = profile
+    event.listen(DBSession, 'after_flush', profile.count_flush)
+    event.listen(DBSession, 'transient_to_pending', profile.count_new_object)
+    try:
+        yield profile
+    finally:
+        event.remove(DBSession, 'after_flush', profile.count_flush)
+        event.remove(
+            DBSession, 'transient_to_pending', profile.count_new_object)
+        _active_profile = None
+        profile.finish()
+        if path:
+            profile.write(path)
+            print('ingest profile written to', str(path))
+
+
+@contextmanager
+def phase(name, **info):
+    """Record a (nested) phase of the import.
+
+    Keyword arguments are added to the phase's entry in the profile as is.
+    """
+    if _active_profile is None:
+        yield
+        return
+    profile = _active_profile
+    profile.push(name, info)
+    try:
+        yield
+    finally:
+        profile.pop()
+
+
+def annotate(**info):
+    """Add some extra information to the current phase."""
+    if _active_profile is not None:
+        _active_profile._stack[-1].update(info)
+
+
+@contextmanager
+def steps():
+    """Record a sequence of phases without nesting `with` blocks.
+
+    Calling `step(name)` ends the previous step and starts a new one.
+    """
+    profile = _active_profile
+    current = False
+
+    def step(name, **info):
+        nonlocal current
+        if profile is None:
+            return
+        if current:
+            profile.pop()
+        profile.push(name, info)
+        current = True
+
+    try:
+        yield step
+    finally:
+        if current:
+            profile.pop()
+
+
+def count_rows(model, count):
+    """Count rows that were written to the database without the orm."""
+    if _active_profile is not None:
+        _active_profile.rows[model.__name__] += count
+        _active_profile.bulk_inserts += 1
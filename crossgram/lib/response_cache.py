@@ -0,0 +1,99 @@
+"""Cache the responses of data table and GeoJSON requests.
+
+The database only changes when `initializedb` runs, so the json a data table
+or a map asks for stays the same until then.  The response cache is a tween
+which keeps these responses in a process-wide LRU cache, keyed by url and
+(normalised) query parameters, and throws them away when the data
+generation changes (see `crossgram.lib.data_generation`).
+
+The number of cached responses is set with `crossgram.response_cache_size`
+(default: 500, 0 turns the cache off).
+"""
+
+import json
+from collections import namedtuple
+
+from pyramid.response import Response
+from pyramid.tweens import INGRESS
+
+from crossgram.lib.data_generation import GenerationCache, data_generation
+
+
+DEFAULT_SIZE = 500
+
+# parameters which don't change the response (`_` is jQuery's cache buster)
+IGNORED_PARAMS = {'_', 'sEcho'}
+
+CachedResponse = namedtuple('CachedResponse', 'body content_type charset')
+
+
+def is_cacheable(request):
+    if request.method != 'GET':
+        return False
+    # see `clld.web.views.index_view`
+    is_datatable = request.is_xhr and 'sEcho' in request.params
+    return is_datatable or request.path.endswith('.geojson')
+
+
+def cache_key(request):
+    params = tuple(sorted(
+        (name, value)
+        for name, value in request.GET.items()
+        if name not in IGNORED_PARAMS))
+    # urls in the responses are absolute
+    return request.application_url, request.path, params
+
+
+def datatable_echo(request):
+    # see `clld.web.views.datatable_xhr_view`
+    try:
+        return str(int(request.params['sEcho']))
+    except ValueError:
+        return '1'
+
+
+def make_response(request, cached):
+    body = cached.body
+    if 'sEcho' in request.params:
+        # the data table needs its own request counter back
+        data = json.loads(body)
+        data['sEcho'] = datatable_echo(request)
+        body = json.dumps(data).encode(cached.charset or 'utf-8')
+    return Response(
+        body=body, content_type=cached.content_type, charset=cached.charset)
+
+
+def response_cache_tween_factory(handler, registry):
+    size = int(registry.settings.get(
+        'crossgram.response_cache_size', DEFAULT_SIZE))
+    if not size:
+        return handler
+    cache = GenerationCache(maxsize=size)
+
+    def response_cache_tween(request):
+        if not is_cacheable(request):
+            return handler(request)
+        key = cache_key(request)
+        # the data may change while the response is being made
+        generation = data_generation()
+        if (cached := cache.lookup(key)) is not None:
+            return make_response(request, cached)
+        response = handler(request)
+        # encoded bodies (see `crossgram.lib.static_geojson`) need their headers
+        if response.status_code == 200 and not response.content_encoding:
+            cache.store(
+                key,
+                CachedResponse(
+                    response.body, response.content_type, response.charset),
+                generation)
+        return response
+
+    return response_cache_tween
+
+
+def includeme(config):
+    # the data generation is looked up in the database, so the cache has to
+    # sit inside the transaction if there is one
+    config.add_tween(
+        'crossgram.lib.response_cache.response_cache_tween_factory',
+        under=('pyramid_tm.tm_tween_factory', INGRESS))
@@ -0,0 +1,265 @@
+"""Serve the GeoJSON of the parameter maps from pre-generated files.
+
+`initializedb` renders the GeoJSON of every L-parameter, and of each of its
+codes, with the normal adapter and writes it to files -- as is, gzipped and,
+if the `brotli` package is installed, compressed with brotli:
+
+    <geojson_dir>/index.json
+    <geojson_dir>/<parameter id>.geojson[.gz|.br]
+    <geojson_dir>/<parameter id>/<code id>.geojson[.gz|.br]
+
+The `static_geojson` tween answers `/parameters/<id>.geojson` requests with
+these files, in the best encoding the browser accepts and with long-lived
+caching headers.  The urls of the map markers are baked into the files, and
+the data may have changed since they were written, so `index.json` records
+the application url and the data generation the files belong to.  If either
+doesn't match, or a file is missing, the request goes on to the adapter.
+
+Settings:
+
+* `crossgram.geojson_dir`: where the files are (default: `geojson` in the
+  package directory)
+* `crossgram.geojson_url`: application url to render the files for (default:
+  `https://<dataset domain>`)
+* `crossgram.geojson_max_age`: seconds browsers may cache a file (default:
+  one week)
+"""
+
+import gzip
+import json
+import os
+import pathlib
+import re
+import shutil
+from urllib.parse import urlsplit
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover
+    brotli = None
+
+from clld.db.meta import DBSession
+from pyramid.response import Response
+from pyramid.tweens import INGRESS, MAIN
+from sqlalchemy.orm import joinedload
+
+from crossgram import models
+from crossgram.adapters import GeoJsonLParameter
+from crossgram.lib.data_generation import data_generation
+
+
+DEFAULT_DIR = pathlib.Path(__file__).parent.parent / 'geojson'
+DEFAULT_MAX_AGE = 7 * 24 * 60 * 60
+
+INDEX_FILE = 'index.json'
+
+# same as the id in the routes of clld resources
+PATH = re.compile(r'/parameters/(?P<id>[^/.]+)\.geojson')
+SAFE_ID = re.compile(r'[^/.]+')
+
+# file name suffixes by content encoding, best first
+ENCODINGS = {'identity': ''}
+if brotli is not None:
+    ENCODINGS = {'br': '.br', 'gzip': '.gz', **ENCODINGS}
+else:  # pragma: no cover
+    ENCODINGS = {'gzip': '.gz', **ENCODINGS}
+
+
+def geojson_dir(settings):
+    path = settings.get('crossgram.geojson_dir')
+    return pathlib.Path(path) if path else DEFAULT_DIR
+
+
+def geojson_path(directory, parameter_id, domainelement_id=None):
+    """Return the path of a GeoJSON file or `None` for unusable ids."""
+    if not SAFE_ID.fullmatch(parameter_id):
+        return None
+    if domainelement_id is None:
+        return directory / f'{parameter_id}.geojson'
+    if not SAFE_ID.fullmatch(domainelement_id):
+        return None
+    return directory / parameter_id / f'{domainelement_id}.geojson'
+
+
+def _write_compressed(path, data):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_bytes(data)
+    path.with_name(path.name + '.gz').write_bytes(
+        gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        path.with_name(path.name + '.br').write_bytes(brotli.compress(data))
+
+
+def _set_application_url(request, url):
+    url = urlsplit(url)
+    request.environ.update({
+        'wsgi.url_scheme': url.scheme,
+        'HTTP_HOST': url.netloc,
+        'SCRIPT_NAME': url.path.rstrip('/'),
+    })
+
+
+def replace_directory(source, target):
+    """Move `source` to `target`, replacing what was there before."""
+    if target.exists():
+        # `os.replace` can't replace non-empty directories, so move the old
+        # one out of the way first -- in between, requests go to the adapter
+        old = target.with_name(f'.{target.name}.old')
+        if old.exists():
+            shutil.rmtree(old)
+        os.replace(target, old)
+        os.replace(source, target)
+        shutil.rmtree(old)
+    else:
+        os.replace(source, target)
+
+
+def write_geojson_files(request, directory, url, generation):
+    """Write the GeoJSON of all L-parameters (and their codes) to files.
+
+    Replaces all files written before.  The files are written to a sibling
+    directory first, so the app never serves half-written files.
+    """
+    # everything else is done, so the session can be emptied as we go
+    DBSession.flush()
+    _set_application_url(request, url)
+    directory = pathlib.Path(directory)
+    new_directory = directory.with_name(f'.{directory.name}.new')
+    if new_directory.exists():
+        shutil.rmtree(new_directory)
+    new_directory.mkdir(parents=True)
+    try:
+        count = _write_geojson_files(request, new_directory, generation)
+    except BaseException:
+        shutil.rmtree(new_directory)
+        raise
+    replace_directory(new_directory, directory)
+    return count
+
+
+def _write_geojson_files(request, directory, generation):
+    pks = DBSession.query(models.LParameter.pk) \
+        .order_by(models.LParameter.pk)
+    count = 0
+    for pk, in pks.all():
+        parameter = DBSession.query(models.LParameter) \
+            .filter(models.LParameter.pk == pk) \
+            .options(joinedload(models.LParameter.domain)) \
+            .one()
+        if (path := geojson_path(directory, parameter.id)):
+            # the layer name the map uses for parameters without a domain
+            adapter = GeoJsonLParameter(parameter, layer=parameter.id)
+            _write_compressed(
+                path, adapter.render(parameter, request).encode('utf-8'))
+            count += 1
+        for domainelement in parameter.domain:
+            path = geojson_path(directory, parameter.id, domainelement.id)
+            if path:
+                adapter = GeoJsonLParameter(
+                    parameter,
+                    domainelement=domainelement.id,
+                    layer=domainelement.id)
+                _write_compressed(
+                    path, adapter.render(parameter, request).encode('utf-8'))
+                count += 1
+        # the value sets of a parameter are only needed once
+        DBSession.expunge_all()
+
+    index = {'application_url': request.application_url, 'generation': generation}
+    (directory / INDEX_FILE).write_text(json.dumps(index), encoding='utf-8')
+    return count
+
+
+class GeoJsonFiles:
+    """Look up pre-generated GeoJSON files for requests."""
+
+    def __init__(self, directory, max_age=DEFAULT_MAX_AGE):
+        self.directory = pathlib.Path(directory)
+        self.max_age = max_age
+        self._index = None
+        self._index_stat = None
+
+    def index(self):
+        # re-read the index whenever `initializedb` replaced the files
+        path = self.directory / INDEX_FILE
+        try:
+            stat = path.stat()
+        except OSError:
+            return None
+        if (stat.st_ino, stat.st_mtime_ns) != self._index_stat:
+            try:
+                self._index = json.loads(path.read_text(encoding='utf-8'))
+            except (OSError, ValueError):
+                self._index = None
+            self._index_stat = (stat.st_ino, stat.st_mtime_ns)
+        return self._index
+
+    def response(self, request):
+        """Return a response serving the file for a request (or `None`)."""
+        if request.method not in ('GET', 'HEAD'):
+            return None
+        if not (match := PATH.fullmatch(request.path)):
+            return None
+        index = self.index()
+        if not index \
+                or index.get('application_url') != request.application_url \
+                or index.get('generation') != data_generation():
+            return None
+
+        parameter_id = match.group('id')
+        domainelement_id = request.params.get('domainelement') or None
+        path = geojson_path(self.directory, parameter_id, domainelement_id)
+        layer = request.params.get('layer')
+        if not path or (layer and layer != (domainelement_id or parameter_id)):
+            return None
+
+        if 'Accept-Encoding' in request.headers:
+            encodings = [
+                encoding
+                for encoding, _ in request.accept_encoding.acceptable_offers(
+                    list(ENCODINGS))]
+        else:
+            encodings = ['identity']
+        for encoding in encodings:
+            try:
+                body = path.with_name(path.name + ENCODINGS[encoding]) \
+                    .read_bytes()
+            except OSError:
+                continue
+            if self.index() is not index:
+                # `initializedb` replaced the files in the meantime
+                return None
+            response = Response(
+                body=body,
+                content_type='application/json',
+                charset='utf-8',
+                conditional_response=True)
+            if encoding != 'identity':
+                response.content_encoding = encoding
+            response.vary = ('Accept-Encoding',)
+            response.cache_control.public = True
+            response.cache_control.max_age = self.max_age
+            response.etag = '{}-{}'.format(index['generation'], encoding)
+            return response
+        return None
+
+
+def static_geojson_tween_factory(handler, registry):
+    files = GeoJsonFiles(
+        geojson_dir(registry.settings),
+        max_age=int(registry.settings.get(
+            'crossgram.geojson_max_age', DEFAULT_MAX_AGE)))
+
+    def static_geojson_tween(request):
+        return files.response(request) or handler(request)
+
+    return static_geojson_tween
+
+
+def includeme(config):
+    # needs the transaction for looking up the data generation, and has to
+    # come before the response cache, which doesn't know about encodings
+    config.add_tween(
+        'crossgram.lib.static_geojson.static_geojson_tween_factory',
+        under=('pyramid_tm.tm_tween_factory', INGRESS),
+        over=('crossgram.lib.response_cache.response_cache_tween_factory', MAIN))
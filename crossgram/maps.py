@@ -3,22 +3,41 @@ from clld.web import maps
 
 
 class LParameterMap(maps.Map):
+    """Map of the values of a parameter, with one layer per code.
+
+    Instead of requesting a GeoJSON file for every single code, the layers
+    start out empty and `CROSSGRAM.splitCodeLayers` fills them all from one
+    GeoJSON response, using the code index of the features.
+    """
 
     def get_layers(self):
         param = self.ctx
         if param.domain:
-            for domainelement in param.domain:
+            data = self.req.resource_url(
+                param, ext='geojson', _query=self.req.query_params)
+            for index, domainelement in enumerate(param.domain):
                 de_query = {
                     'domainelement': str(domainelement.id),
                     **self.req.query_params}
-                data = self.req.resource_url(
-                    param, ext='geojson', _query=de_query)
                 marker = helpers.map_marker_img(
                     self.req, domainelement, marker=self.map_marker)
+                empty_layer = {
+                    'type': 'FeatureCollection',
+                    'properties': {
+                        'layer': domainelement.id,
+                        'name': domainelement.name,
+                        'code': index,
+                        'data': data,
+                        # for showing the GeoJSON of a single code
+                        'url': self.req.resource_url(
+                            param, ext='geojson', _query=de_query),
+                    },
+                    'features': [],
+                }
                 yield maps.Layer(
                     domainelement.id,
                     domainelement.name,
-                    data,
+                    empty_layer,
                     marker=marker)
         else:
             data = self.req.resource_url(param, ext='geojson')
@@ -26,11 +45,14 @@ class LParameterMap(maps.Map):
 
     def get_options(self):
         param = self.ctx
-        return {
+        options = {
             'resize_direction': 's',
             'info_query': {'parameter': param.pk},
             'hash': True,
         }
+        if param.domain:
+            options['on_init'] = helpers.JS('CROSSGRAM.splitCodeLayers')
+        return options
 
 
 def includeme(config):
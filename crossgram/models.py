@@ -1,18 +1,27 @@
 import re
+from collections import namedtuple
 
 from zope.interface import implementer
 from sqlalchemy import (
+    DDL,
     Column,
     Unicode,
     Integer,
     Boolean,
     ForeignKey,
+    Index,
     UniqueConstraint,
     Date,
+    JSON,
+    UnicodeText,
+    event,
+    inspect,
 )
-from sqlalchemy.orm import relationship
+from sqlalchemy.dialects.postgresql import TSVECTOR
+from sqlalchemy.orm import deferred, relationship
 
 from clld import interfaces
+from clldutils import jsonlib
 from clld.db.meta import Base, CustomModelMixin
 from clld.db.models.common import (
     Contribution,
@@ -81,16 +90,37 @@ class CrossgramData(CustomModelMixin, Contribution):
 
 class ContributionLanguage(Base):
 
-    __table_args__ = (UniqueConstraint('language_pk', 'contribution_pk'),)
+    __table_args__ = (
+        UniqueConstraint('language_pk', 'contribution_pk'),
+        # sorting and searching languages by their name in a contribution
+        Index(
+            'contributionlanguage_contribution_name',
+            'contribution_pk', 'language_name'),
+        Index(
+            'contributionlanguage_name_trgm',
+            'language_name',
+            postgresql_using='gin',
+            postgresql_ops={'language_name': 'gin_trgm_ops'}),
+    )
 
     contribution_pk = Column(Integer, ForeignKey('contribution.pk'))
     contribution = relationship(Contribution, backref='language_assocs')
     language_pk = Column(Integer, ForeignKey('language.pk'))
     language = relationship(Language, backref='contribution_assocs')
     custom_language_name = Column(Unicode)
+    # name of the language as shown in the contribution (i.e. the custom name
+    # or the language's default name)
+    language_name = Column(Unicode)
     source_comment = Column(Unicode)
 
 
+# trigram indexes need the `pg_trgm` extension
+event.listen(
+    Base.metadata,
+    'before_create',
+    DDL('CREATE EXTENSION IF NOT EXISTS pg_trgm').execute_if(dialect='postgresql'))
+
+
 @implementer(interfaces.IUnit)
 class Construction(CustomModelMixin, Unit):
     pk = Column(Integer, ForeignKey('unit.pk'), primary_key=True)
@@ -141,11 +171,50 @@ class LValueSet(CustomModelMixin, ValueSet):
 
 @implementer(interfaces.ISentence)
 class Example(CustomModelMixin, Sentence):
+
+    __table_args__ = (
+        Index('example_search_vector', 'search_vector', postgresql_using='gin'),
+    )
+
     pk = Column(Integer, ForeignKey('sentence.pk'), primary_key=True)
     number = Column(Integer)
     contribution_pk = Column(Integer, ForeignKey('contribution.pk'))
     contribution = relationship(CrossgramData, backref='examples')
     source_comment = Column(Unicode)
+    # filled in by `crossgram.lib.example_search.update_search_vectors`
+    # (only PostgreSQL has full-text search, but the tests use SQLite)
+    search_vector = deferred(Column(
+        UnicodeText().with_variant(TSVECTOR(), 'postgresql')))
+
+    def __json__(self, req):
+        # same as `Base.__json__`, but without loading the search vector
+        exclude = {
+            'active', 'version', 'created', 'updated', 'polymorphic_type',
+            'search_vector'}
+        cols = [
+            col.key for om in inspect(self).mapper.iterate_to_root()
+            for col in om.local_table.c
+            if col.key not in exclude and not exclude.add(col.key)]
+        return {col: jsonlib.format(getattr(self, col)) for col in cols}
+
+
+class GlossToken(Base):
+    """Single gloss morpheme of an example, with the word it belongs to."""
+
+    __table_args__ = (
+        Index('glosstoken_token', 'token', 'contribution_pk'),
+    )
+
+    example_pk = Column(Integer, ForeignKey('example.pk'), nullable=False)
+    example = relationship(Example, innerjoin=True)
+    contribution_pk = Column(Integer, ForeignKey('contribution.pk'))
+    contribution = relationship(CrossgramData)
+    # index of the word in the example (starting at 0)
+    position = Column(Integer, nullable=False)
+    # analysed word and its full gloss
+    word = Column(Unicode)
+    gloss = Column(Unicode)
+    token = Column(Unicode, nullable=False)
 
 
 class LanguageReference(Base, HasSourceNotNullMixin):
@@ -156,6 +225,10 @@ class LanguageReference(Base, HasSourceNotNullMixin):
     language = relationship(Language, innerjoin=True, backref='references')
 
 
+ParameterLink = namedtuple(
+    'ParameterLink', 'route id name contribution_id contribution_name')
+
+
 @implementer(ITopic)
 class Topic(Base, IdNameDescriptionMixin):
     pk = Column(Integer, primary_key=True)
@@ -168,6 +241,18 @@ class Topic(Base, IdNameDescriptionMixin):
     sil_url = Column(Unicode)
     # TODO(johannes): remove when we move to showing *all* topics
     used = Column(Boolean, default=False)
+    # denormalised list of associated parameters (see `parameter_links`)
+    parameter_list = Column(JSON)
+
+    def parameter_links(self, route=None):
+        """Return what's needed to link to the parameters of the topic.
+
+        `route` is 'parameter' or 'unitparameter' to only get one kind.
+        """
+        return [
+            ParameterLink(*link)
+            for link in self.parameter_list or ()
+            if route is None or link[0] == route]
 
 
 class ParameterTopic(Base):
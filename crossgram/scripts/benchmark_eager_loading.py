@@ -0,0 +1,132 @@
+"""Compare the eager loading strategies of the data tables.
+
+Renders pages of the data tables of an existing database with each strategy
+in `crossgram.lib.eager_loading` and reports how many queries run, how many
+rows the database sends back, and how long it takes:
+
+    python -m crossgram.scripts.benchmark_eager_loading development.ini
+    python -m crossgram.scripts.benchmark_eager_loading development.ini \\
+        --table values --table sentences --page-size 10 --page-size 100
+"""
+
+import argparse
+import statistics
+import time
+
+import transaction
+from clld.db.meta import DBSession
+from clld.db.models import common
+from clld.web.app import ClldRequest
+from pyramid.events import NewRequest
+from pyramid.paster import bootstrap
+from pyramid.scripting import prepare
+from sqlalchemy import event
+
+from crossgram import models
+from crossgram.lib.eager_loading import STRATEGIES
+
+TABLES = {
+    'languages': common.Language,
+    'parameters': common.Parameter,
+    'values': common.Value,
+    'unitparameters': common.UnitParameter,
+    'units': common.Unit,
+    'unitvalues': common.UnitValue,
+    'sentences': common.Sentence,
+    'sources': common.Source,
+    'glosstokens': models.GlossToken,
+}
+
+PAGE_SIZES = [10, 50, 100]
+
+
+class StatementLog:
+    """Remember the select statements sent to the database."""
+
+    def __init__(self, engine):
+        self.statements = []
+        event.listen(engine, 'before_cursor_execute', self._log)
+
+    def _log(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip().upper().startswith('SELECT'):
+            self.statements.append((statement, parameters))
+
+    def count_rows(self):
+        """Count the rows the logged statements return."""
+        statements, self.statements = self.statements, []
+        connection = DBSession.connection()
+        return sum(
+            connection.exec_driver_sql(
+                f'SELECT count(*) FROM ({statement}) AS rows', parameters
+            ).scalar()
+            for statement, parameters in statements)
+
+
+def render_page(registry, table, page_size, strategy):
+    request = ClldRequest.blank(
+        f'/{table}?sEcho=1&iDisplayLength={page_size}',
+        headers={'X-Requested-With': 'XMLHttpRequest'})
+    env = prepare(request=request, registry=registry)
+    # clld sets up translations etc. in `NewRequest` subscribers
+    registry.notify(NewRequest(request))
+    try:
+        datatable = request.get_datatable(table, TABLES[table])
+        datatable.__prefetch_strategy__ = strategy
+        # same as `clld.web.views.datatable_xhr_view`
+        return [
+            [col.format(item) for col in datatable.cols]
+            for item in datatable.get_query()]
+    finally:
+        env['closer']()
+
+
+def measure(registry, log, table, page_size, strategy, repeat):
+    # the first run fills the caches for counts and filter choices
+    render_page(registry, table, page_size, strategy)
+    timings = []
+    for _ in range(repeat):
+        DBSession.expunge_all()
+        log.statements = []
+        start = time.perf_counter()
+        render_page(registry, table, page_size, strategy)
+        timings.append(time.perf_counter() - start)
+    query_count = len(log.statements)
+    row_count = log.count_rows()
+    return query_count, row_count, statistics.median(timings) * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('config_uri', help='app config, e.g. development.ini')
+    parser.add_argument(
+        '--table', action='append', choices=sorted(TABLES),
+        help='data table to measure (default: all)')
+    parser.add_argument(
+        '--page-size', action='append', type=int,
+        help='rows per page (default: {})'.format(
+            ', '.join(map(str, PAGE_SIZES))))
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    env = bootstrap(args.config_uri)
+    registry = env['registry']
+    log = StatementLog(DBSession.get_bind())
+
+    print(
+        f"{'table':<16} {'page':>5} {'strategy':<10}"
+        f" {'queries':>8} {'rows':>8} {'time':>10}")
+    with transaction.manager:
+        for table in args.table or TABLES:
+            for page_size in args.page_size or PAGE_SIZES:
+                for strategy in STRATEGIES:
+                    query_count, row_count, ms = measure(
+                        registry, log, table, page_size, strategy, args.repeat)
+                    print(
+                        f'{table:<16} {page_size:>5} {strategy:<10}'
+                        f' {query_count:>8} {row_count:>8} {ms:>8.1f}ms')
+        transaction.abort()
+    env['closer']()
+
+
+if __name__ == '__main__':
+    main()
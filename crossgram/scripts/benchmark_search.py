@@ -0,0 +1,224 @@
+"""Benchmark the substring searches of the data tables.
+
+Fills an *empty* PostgreSQL database with a synthetic data set of one
+million values and 100,000 sources, then times the queries the value and source tables run when searching,
+first without and then with the trigram indexes `initializedb` creates.
+For every search, it also reports which trigram index the query planner
+picks (`--explain` prints the whole plans):
+
+    createdb crossgram_bench
+    python -m crossgram.scripts.benchmark_search postgresql://localhost/crossgram_bench
+"""
+
+import argparse
+import statistics
+import time
+
+import sqlalchemy
+import transaction
+from clld.db.meta import Base, DBSession
+from clld.db.models import common
+from clld.db.util import icontains
+from zope.sqlalchemy import mark_changed
+
+from crossgram import models  # noqa: F401 (register the crossgram tables)
+from crossgram.scripts.initializedb import (
+    TRIGRAM_INDEXES, create_search_indexes, trigram_index_name)
+
+WORDS = [
+    'present', 'past', 'future', 'ergative', 'absolutive', 'accusative',
+    'nominative', 'dative', 'genitive', 'locative', 'perfective',
+    'imperfective', 'singular', 'plural', 'dual', 'causative', 'passive',
+    'antipassive', 'evidential', 'reflexive',
+]
+
+# query strings: common word, rare word, word pair, random noise, no match
+QUERIES = ['tive', 'antipassive', 'past dual', '3fa', 'xyzzy']
+# query strings: author name, year, common word, random noise, no match
+SOURCE_QUERIES = ['author4711', '1987', 'dual', '3fa', 'xyzzy']
+
+
+def fill_database(language_count, parameter_count, source_count):
+    words = 'ARRAY[{}]'.format(', '.join(f"'{w}'" for w in WORDS))
+
+    def word(factor):
+        return f'({words})[1 + (pk * {factor}) % {len(WORDS)}]'
+
+    for query in [
+        # the value sets join the contribution as `CrossgramData`
+        """
+        INSERT INTO contribution (pk, id, name, polymorphic_type, active)
+        VALUES (1, 'bench', 'Benchmark', 'custom', true)
+        """,
+        "INSERT INTO crossgramdata (pk, number) VALUES (1, 1)",
+        """
+        INSERT INTO language (pk, id, name, polymorphic_type, active)
+        SELECT i, 'lang' || i, 'Language ' || i, 'base', true
+        FROM generate_series(1, :languages) AS i
+        """,
+        """
+        INSERT INTO parameter (pk, id, name, polymorphic_type, active)
+        SELECT i, 'param' || i, 'Parameter ' || i, 'base', true
+        FROM generate_series(1, :parameters) AS i
+        """,
+        """
+        INSERT INTO valueset (
+            pk, id, language_pk, parameter_pk, contribution_pk,
+            polymorphic_type, active)
+        SELECT
+            (l - 1) * :parameters + p, 'vs-' || l || '-' || p, l, p, 1,
+            'base', true
+        FROM generate_series(1, :languages) AS l,
+             generate_series(1, :parameters) AS p
+        """,
+        f"""
+        INSERT INTO value (
+            pk, id, valueset_pk, name, description,
+            polymorphic_type, active)
+        SELECT
+            pk,
+            'v' || pk,
+            pk,
+            {word(7)} || ' ' || {word(13)},
+            substr(md5(pk::text), 1, 12),
+            'base', true
+        FROM valueset
+        """,
+        f"""
+        INSERT INTO source (
+            pk, id, name, description, author, polymorphic_type, active)
+        SELECT
+            pk,
+            'src' || pk,
+            'Author' || pk || ' ' || (1900 + pk % 120),
+            'The ' || {word(3)} || ' in ' || substr(md5(pk::text), 1, 8),
+            'Author' || pk || ', A. and ' || initcap({word(11)}) || ', B.',
+            'base', true
+        FROM generate_series(1, :sources) AS pk
+        """,
+    ]:
+        DBSession.execute(
+            sqlalchemy.text(query),
+            {
+                'languages': language_count,
+                'parameters': parameter_count,
+                'sources': source_count,
+            })
+    DBSession.execute(sqlalchemy.text('ANALYZE'))
+    # the session doesn't notice plain sql, so the fill would be rolled back
+    mark_changed(DBSession())
+
+
+def search_query(column, query_string):
+    if column.class_ is common.Source:
+        query = DBSession.query(common.Source)
+    else:
+        # same joins as `crossgram.datatables.LValues`
+        query = DBSession.query(common.Value) \
+            .join(common.ValueSet) \
+            .join(common.ValueSet.parameter) \
+            .join(common.ValueSet.language) \
+            .join(common.ValueSet.contribution)
+    return query.filter(icontains(column, query_string))
+
+
+def time_search(column, query_string, repeat):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        query = search_query(column, query_string)
+        count = query.count()
+        query.order_by(column.class_.pk).limit(100).all()
+        timings.append(time.perf_counter() - start)
+        DBSession.expunge_all()
+    return count, statistics.median(timings) * 1000
+
+
+def explain_search(column, query_string):
+    """Return the query plan of a search and the trigram indexes it uses."""
+    statement = search_query(column, query_string).statement.compile(
+        dialect=DBSession.get_bind().dialect,
+        compile_kwargs={'render_postcompile': True})
+    plan = '\n'.join(
+        line for line, in DBSession.connection().exec_driver_sql(
+            f'EXPLAIN {statement}', statement.params))
+    indexes = [
+        name
+        for table, column in TRIGRAM_INDEXES
+        if (name := trigram_index_name(table, column)) in plan]
+    return plan, indexes
+
+
+def run_searches(repeat):
+    return {
+        (column.class_.__tablename__, column.key, query_string): (
+            *time_search(column, query_string, repeat),
+            *explain_search(column, query_string))
+        for column, queries in [
+            (common.Value.name, QUERIES),
+            (common.Value.description, QUERIES),
+            (common.Source.name, SOURCE_QUERIES),
+            (common.Source.description, SOURCE_QUERIES),
+            (common.Source.author, SOURCE_QUERIES),
+        ]
+        for query_string in queries}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split('\n')[0])
+    parser.add_argument('db_url', help='sqlalchemy url of an empty database')
+    parser.add_argument('--languages', type=int, default=1000)
+    parser.add_argument('--parameters', type=int, default=1000)
+    parser.add_argument('--sources', type=int, default=100000)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument(
+        '--explain', action='store_true',
+        help='print the query plans with the trigram indexes')
+    args = parser.parse_args()
+
+    engine = sqlalchemy.create_engine(args.db_url)
+    DBSession.configure(bind=engine)
+    Base.metadata.create_all(engine)
+
+    with transaction.manager:
+        if DBSession.query(common.Value).first():
+            parser.error('database is not empty')
+        print(
+            'Filling database with',
+            args.languages * args.parameters, 'values and',
+            args.sources, 'sources...')
+        fill_database(args.languages, args.parameters, args.sources)
+
+    with transaction.manager:
+        print('Searching without trigram indexes...')
+        before = run_searches(args.repeat)
+        print('Creating', len(TRIGRAM_INDEXES), 'trigram indexes...')
+        start = time.perf_counter()
+        create_search_indexes()
+        print(f'... done ({time.perf_counter() - start:.1f}s)')
+        print('Searching with trigram indexes...')
+        after = run_searches(args.repeat)
+        # leave the database as we found it, except for the data
+        transaction.abort()
+
+    if args.explain:
+        for (table, column, query_string), (_, _, plan, _) in after.items():
+            print()
+            print(f'{table}.{column} ILIKE %{query_string}%:')
+            print(plan)
+
+    print()
+    print(
+        f"{'column':<18} {'query':<12} {'matches':>8} {'before':>10}"
+        f" {'after':>10}  index")
+    for key, (count, before_ms, _, _) in before.items():
+        table, column, query_string = key
+        _, after_ms, _, indexes = after[key]
+        print(
+            f'{table + "." + column:<18} {query_string:<12} {count:>8}'
+            f' {before_ms:>8.1f}ms {after_ms:>8.1f}ms'
+            f'  {", ".join(indexes) or "-"}')
+
+
+if __name__ == '__main__':
+    main()
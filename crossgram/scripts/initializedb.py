@@ -1,11 +1,12 @@
 import pathlib
 import re
+import time
 from collections import namedtuple
-from datetime import date
-from itertools import chain, cycle
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from datetime import date, datetime
+from itertools import chain, cycle, islice
 
 import cldfcatalog
-import cldfzenodo
 import git
 import sqlalchemy
 from bs4 import BeautifulSoup
@@ -19,24 +20,61 @@ from clldutils.misc import slug
 from csvw import dsv
 from markdown import markdown
 from pyglottolog import Glottolog
+from pyramid.settings import asbool
 
 import crossgram
 from crossgram import models
 from crossgram.lib.cldf import CLDFBenchSubmission
-from crossgram.lib.cldf_zenodo import download_from_doi
+from crossgram.lib.cldf_zenodo import (
+    DEFAULT_RECORD_TTL, ZenodoRecordCache, download_from_doi,
+)
+from crossgram.lib.data_generation import new_data_generation
+from crossgram.lib.example_search import update_search_vectors
+from crossgram.lib.glottolog_index import GlottologIndex
 from crossgram.lib.horrible_denormaliser import BlockEncoder
+from crossgram.lib.profiling import annotate, ingest_profile, phase
+from crossgram.lib.static_geojson import geojson_dir, write_geojson_files
 
 ISOLATES_ICON = 'cff6600'
 
-
-def download_data(sid, contrib_md, cache_dir):
+INTERNAL_REPO = pathlib.Path('../../crossgram/crossgram-internal')
+CACHE_DIR = INTERNAL_REPO / 'datasets'
+PARSE_CACHE_DIR = CACHE_DIR / 'parsed'
+PROFILE_DIR = CACHE_DIR / 'profiles'
+ZENODO_RECORD_CACHE = CACHE_DIR / 'zenodo-records.json'
+DEFAULT_DOWNLOAD_WORKERS = 4
+
+# (table, column) pairs the data tables search with `ILIKE '%...%'`
+TRIGRAM_INDEXES = [
+    ('language', 'name'),
+    ('parameter', 'name'),
+    ('parameter', 'description'),
+    ('value', 'name'),
+    ('value', 'description'),
+    ('unitparameter', 'name'),
+    ('unitparameter', 'description'),
+    ('unit', 'name'),
+    ('unit', 'description'),
+    ('unitvalue', 'name'),
+    ('unitvalue', 'description'),
+    ('sentence', 'name'),
+    ('sentence', 'description'),
+    ('sentence', 'gloss'),
+    ('source', 'name'),
+    ('source', 'description'),
+    ('source', 'author'),
+]
+GRAMMATICON_REPO = pathlib.Path('../grammaticon-data/csvw')
+
+
+def download_data(sid, contrib_md, cache_dir, download_doi=download_from_doi):
     if contrib_md.get('doi'):
         doi = contrib_md['doi']
         path = cache_dir / f'{sid}-{slug(doi)}'
         if not path.exists():
-            print(' * downloading dataset from Zenodo; doi:', doi)
-            download_from_doi(doi, path)
-            print('   done.')
+            print(f' * [{sid}] downloading dataset from Zenodo; doi:', doi)
+            download_doi(doi, path)
+            print(f'   [{sid}] done.')
         return path
 
     elif contrib_md.get('repo'):
@@ -46,29 +84,97 @@ def download_data(sid, contrib_md, cache_dir):
             # specific commit/tag/branch
             path = cache_dir / f'{sid}-{slug(checkout)}'
             if not path.exists():
-                print(' * cloning', repo, 'into', path, '...')
+                print(f' * [{sid}] cloning', repo, 'into', path, '...')
                 git.Git().clone(repo, path)
-                print('   done.')
-                print(' * checking out commit', checkout, '...')
+                print(f'   [{sid}] done.')
+                print(f' * [{sid}] checking out commit', checkout, '...')
                 git.Git(str(path)).checkout(checkout)
-                print('   done.')
+                print(f'   [{sid}] done.')
         else:
             # latest commit on the default branch
             path = cache_dir / sid
             if not path.exists():
-                print(' * cloning', repo, 'into', path, '...')
+                print(f' * [{sid}] cloning', repo, 'into', path, '...')
                 git.Git().clone(repo, path)
-                print('   done.')
+                print(f'   [{sid}] done.')
             else:
-                print(' * pulling latest commit')
+                print(f' * [{sid}] pulling latest commit')
                 git.Git(str(path)).pull()
-                print('   done.')
+                print(f'   [{sid}] done.')
         return path
 
     else:
         return cache_dir / sid
 
 
+def submissions_dir(internal):
+    if internal:
+        return INTERNAL_REPO / 'submissions-internal'
+    else:
+        return INTERNAL_REPO / 'submissions'
+
+
+def iter_submission_metadata(submissions_path, which_submission):
+    for contrib_dir in submissions_path.iterdir():
+        if not contrib_dir.is_dir():
+            continue
+        if which_submission != 'all' and which_submission != contrib_dir.name:
+            continue
+        sid = contrib_dir.name
+
+        contrib_md = jsonlib.load(contrib_dir / 'md.json')
+        if contrib_md.get('hide'):
+            print(sid, "doesn't want to be shown")
+            continue
+
+        yield sid, contrib_dir, contrib_md
+
+
+def _timed_download(sid, contrib_md, cache_dir, download_doi):
+    start = time.perf_counter()
+    path = download_data(sid, contrib_md, cache_dir, download_doi)
+    return path, time.perf_counter() - start
+
+
+def fetch_submissions(
+    submissions_path, which_submission, cache_dir, workers=None,
+    download_doi=download_from_doi,
+):
+    """Download or update the data of all submissions.
+
+    All `md.json` files are read first, then the datasets are fetched in
+    parallel by at most `workers` threads (downloads mostly wait for the
+    network anyway).  Returns a list of `(sid, contrib_dir, contrib_md,
+    cldfbench_path)` tuples in the same order as the submissions.
+    """
+    submissions = list(iter_submission_metadata(
+        submissions_path, which_submission))
+
+    with ThreadPoolExecutor(
+        max_workers=workers or DEFAULT_DOWNLOAD_WORKERS
+    ) as pool:
+        downloads = [
+            pool.submit(
+                _timed_download, sid, contrib_md, cache_dir, download_doi)
+            for sid, _, contrib_md in submissions]
+        results = [download.result() for download in downloads]
+
+    print('Download times:')
+    for (sid, _, _), (_, seconds) in zip(submissions, results):
+        print(f' * {sid}: {seconds:.1f}s')
+    annotate(download_times={
+        sid: seconds
+        for (sid, _, _), (_, seconds) in zip(submissions, results)})
+
+    to_load = []
+    for (sid, contrib_dir, contrib_md), (cldfbench_path, _) in zip(submissions, results):
+        if not cldfbench_path.exists():
+            print('could not find folder', str(cldfbench_path))
+            continue
+        to_load.append((sid, contrib_dir, contrib_md, cldfbench_path))
+    return to_load
+
+
 def maybe_read_file(file_path):
     try:
         with open(file_path, encoding='utf-8') as f:
@@ -78,16 +184,19 @@ def maybe_read_file(file_path):
         return None
 
 
-def make_families(language_families, languages, languoids):
-    families = {}
+def make_families(language_families, languages, languoids, families=None):
+    families = dict(families or ())
     lang_family_map = {}
-    languoids_by_name = {slug(lg.name): lg for lg in languoids.values()}
-    icons = cycle([i.name for i in ORDERED_ICONS if i.name != ISOLATES_ICON])
+    # continue the icon cycle where the existing families left off
+    icons = islice(
+        cycle([i.name for i in ORDERED_ICONS if i.name != ISOLATES_ICON]),
+        len(families),
+        None)
     for language in languages.values():
         if (languoid := languoids.get(language.id)):
-            if languoid.lineage:
-                old_family_id = languoid.lineage[0][1]
-            elif languoid.level.id == 'family':
+            if languoid.family_id:
+                old_family_id = languoid.family_id
+            elif languoid.level == 'family':
                 # Make sure top-level families are not treated as isolates!
                 old_family_id = languoid.id
             else:
@@ -101,7 +210,7 @@ def make_families(language_families, languages, languoids):
             continue
         family = (
             languoids.get(old_family_id)
-            or languoids_by_name.get(old_family_id))
+            or languoids.get_by_name(old_family_id))
         if not family:
             continue
         if family.id not in families:
@@ -114,39 +223,429 @@ def make_families(language_families, languages, languoids):
     return families, lang_family_map
 
 
-def collect_language_sources():
-    existing_sources = set(DBSession.execute(
-        sqlalchemy.select(
-            models.LanguageReference.language_pk,
-            models.LanguageReference.source_pk)
-        .distinct()))
-
-    language_sources = set(DBSession.execute(
-        sqlalchemy.select(
-            common.ValueSet.language_pk,
-            common.ValueSetReference.source_pk)
-        .join(common.ValueSetReference.valueset)
-        .distinct()))
-    language_sources.update(DBSession.execute(
-        sqlalchemy.select(
-            common.Unit.language_pk,
-            models.UnitValueReference.source_pk)
-        .join(models.UnitValueReference.unitvalue)
-        .join(common.UnitValue.unit)
-        .distinct()))
-    language_sources.update(DBSession.execute(
-        sqlalchemy.select(
-            common.Unit.language_pk,
-            models.UnitReference.source_pk)
-        .join(models.UnitReference.unit)
-        .distinct()))
-    language_sources = sorted(language_sources - existing_sources)
+def add_submission(
+    sid, contrib_dir, contrib_md, cldfbench_path, submission,
+    all_languages, all_contributors, all_families, topics, languoids,
+    zenodo_records, bulk=False,
+):
+    doi = contrib_md.get('doi')
+    with phase('zenodo_version'):
+        version = zenodo_records.version(doi) if doi else None
+
+    date_match = re.fullmatch(r'(\d+)-(\d+)-(\d+)', contrib_md['published'])
+    assert date_match
+    yyyy, mm, dd = date_match.groups()
+    published = date(int(yyyy), int(mm), int(dd))
+
+    # strip ssh stuff off of git link
+    git_https = re.sub(
+        '^git@([^:]*):', r'https://\1/', contrib_md.get('repo') or '')
+
+    intro = (
+        maybe_read_file(contrib_dir / 'intro.md')
+        or maybe_read_file(cldfbench_path / 'raw' / 'intro.md')
+        or submission.readme)
+
+    contrib = models.CrossgramData(
+        id=sid,
+        number=int(contrib_md['number']),
+        published=published,
+        original_year=contrib_md.get('original-year') or str(published.year),
+        name=contrib_md.get('title') or submission.title,
+        doi=doi,
+        version=version,
+        git_repo=git_https,
+        description=intro)
+    DBSession.add(contrib)
+
+    DBSession.flush()
+
+    new_languages, new_contributors, new_families = submission.add_to_database(
+        contrib, all_languages, all_contributors, topics, languoids,
+        bulk=bulk)
+    assert all(lg.id not in all_languages for lg in new_languages)
+    assert all(lg_id not in all_languages for lg_id in new_families)
+    assert all(c.id not in all_contributors for c in new_contributors)
+    all_languages.update(
+        (language.id, language)
+        for language in new_languages)
+    all_contributors.update(
+        (contributor.id, contributor)
+        for contributor in new_contributors)
+    all_families.update(new_families.items())
+
+
+def load_languoids():
+    print('Loading glottolog...')
+    catconf = cldfcatalog.Config.from_file()
+    glottolog_path = catconf.get_clone('glottolog')
+    glottolog = Glottolog(glottolog_path)
+    CACHE_DIR.mkdir(exist_ok=True)
+    return GlottologIndex.from_glottolog(
+        CACHE_DIR / 'glottolog-index.sqlite', glottolog)
+
+
+def load_topics():
+    csv_topics = (
+        {k: v for k, v in csv_topic.items() if v}
+        for csv_topic in dsv.iterrows(
+            GRAMMATICON_REPO / 'concepts.csv', dicts=True))
+    return {
+        topic.get('Grammacode') or topic['ID']: models.Topic(
+            id=topic.get('Grammacode') or topic['ID'],
+            name=topic['Name'],
+            description=topic.get('Description'),
+            grammacode=topic.get('Grammacode'),
+            comment=topic.get('Comment'),
+            quotation=topic.get('Quotation'),
+            wikipedia_counterpart=topic.get('Wikipedia_Counterpart'),
+            wikipedia_url=topic.get('Wikipedia_URL'),
+            sil_counterpart=topic.get('SIL_Counterpart'),
+            sil_url=topic.get('SIL_URL'))
+        for topic in csv_topics}
+
+
+def add_families(language_families, languages, languoids, families=None):
+    families, lang_family_map = make_families(
+        language_families, languages, languoids, families)
+    DBSession.add_all(families.values())
+
+    DBSession.flush()
+
+    for language in languages.values():
+        if (family_id := lang_family_map.get(language.id)):
+            language.family_pk = families[family_id].pk
+
+
+def mark_used_topics():
+    # TODO(johannes): remove when we move to showing *all* topics
+    used_topics = {
+        tuple_of_size_one[0]
+        for tuple_of_size_one in chain(
+            DBSession.execute(sqlalchemy.select(models.ParameterTopic.topic_pk).distinct()),
+            DBSession.execute(sqlalchemy.select(models.UnitParameterTopic.topic_pk).distinct()))}
+    for topic in DBSession.query(models.Topic):
+        topic.used = topic.pk in used_topics
+
+
+def denormalise_topics():
+    """Store the parameters of each topic in the topic itself.
+
+    This way the topic list and the topic pages don't need to join their way
+    through parameters and contributions for every single topic.
+    """
+    lparameters = DBSession.query(
+        models.ParameterTopic.topic_pk,
+        sqlalchemy.literal('parameter'),
+        models.LParameter.id,
+        models.LParameter.name,
+        models.CrossgramData.id,
+        models.CrossgramData.name,
+        models.LParameter.pk,
+    ) \
+        .join(models.ParameterTopic.parameter.of_type(models.LParameter)) \
+        .join(models.LParameter.contribution)
+    cparameters = DBSession.query(
+        models.UnitParameterTopic.topic_pk,
+        sqlalchemy.literal('unitparameter'),
+        models.CParameter.id,
+        models.CParameter.name,
+        models.CrossgramData.id,
+        models.CrossgramData.name,
+        models.CParameter.pk,
+    ) \
+        .join(models.UnitParameterTopic.unitparameter.of_type(models.CParameter)) \
+        .join(models.CParameter.contribution)
+
+    # the same grammacode can be listed twice for a parameter
+    rows = sorted(
+        set(chain(lparameters, cparameters)),
+        key=lambda row: (row[0], row[1], row[-1]))
+    parameter_lists = {}
+    for topic_pk, *link, _ in rows:
+        parameter_lists.setdefault(topic_pk, []).append(link)
+    for topic in DBSession.query(models.Topic):
+        topic.parameter_list = parameter_lists.get(topic.pk)
+
+
+def write_geojson(args, generation):
+    dataset = DBSession.query(common.Dataset).one()
+    url = args.settings.get('crossgram.geojson_url') \
+        or f'https://{dataset.domain}'
+    directory = geojson_dir(args.settings)
+    count = write_geojson_files(args.env['request'], directory, url, generation)
+    print(f'... {count} files written to {directory}')
+
+
+def render_description(contrib):
+    if contrib.description:
+        html_desc = markdown(contrib.description, extensions=['tables'])
+        desc, toc = make_toc(html_desc)
+        contrib.markup_description = desc
+        contrib.toc = toc
+    else:
+        contrib.markup_description = None
+
+
+def add_language_identifiers(languages, languoids):
+    existing_identifiers = {
+        (identifier.type, identifier.id): identifier
+        for identifier in DBSession.query(common.Identifier)}
+
+    glottolog_languages = [
+        languoid
+        for language in languages
+        if (languoid := languoids.get(language.id))]
+    glottocodes = {
+        languoid.id:
+            existing_identifiers.get(('glottolog', languoid.id))
+            or common.Identifier(
+                id=languoid.id,
+                name=languoid.id,
+                type='glottolog')
+        for languoid in glottolog_languages}
+    isocodes = {
+        languoid.id:
+            existing_identifiers.get(('iso639-3', isocode))
+            or common.Identifier(
+                id=isocode,
+                name=isocode,
+                type='iso639-3')
+        for languoid in glottolog_languages
+        if (isocode := languoid.iso)}
+
+    DBSession.add_all(glottocodes.values())
+    DBSession.add_all(isocodes.values())
+
+    DBSession.flush()
 
     DBSession.add_all(
-        models.LanguageReference(
-            language_pk=language_pk,
-            source_pk=source_pk)
-        for language_pk, source_pk in language_sources)
+        common.LanguageIdentifier(
+            language_pk=language.pk,
+            identifier_pk=identifier.pk)
+        for language in languages
+        if (identifier := glottocodes.get(language.id)))
+    DBSession.add_all(
+        common.LanguageIdentifier(
+            language_pk=language.pk,
+            identifier_pk=identifier.pk)
+        for language in languages
+        if (identifier := isocodes.get(language.id)))
+
+
+def denormalise_languages(languages, only_these=False):
+    name_encoder = BlockEncoder()
+    source_encoder = BlockEncoder()
+    contrib_lang_query = DBSession.query(models.ContributionLanguage)\
+        .join(models.Language)
+    if only_these:
+        contrib_lang_query = contrib_lang_query.filter(
+            models.ContributionLanguage.language_pk.in_(
+                [language.pk for language in languages]))
+    for contrib_lang in contrib_lang_query:
+        lang_id = contrib_lang.language.id
+        contrib_pk = contrib_lang.contribution_pk
+        name_encoder.record_value(
+            lang_id, contrib_pk, contrib_lang.custom_language_name)
+        source_encoder.record_value(
+            lang_id, contrib_pk, contrib_lang.source_comment)
+
+    for language in languages:
+        language.source_comments = source_encoder.encode(language.id)
+        language.custom_names = name_encoder.encode(
+            language.id, language.name)
+
+
+def count_examples(language_pks):
+    """Recount the examples of a set of languages.
+
+    During a normal import, examples are counted as they are added.  This is
+    only needed if examples were deleted.
+    """
+    params = {'language_pks': list(language_pks)}
+    # languages might have lost all their examples
+    DBSession.execute(
+        sqlalchemy.text("""
+            UPDATE variety
+            SET example_count = NULL
+            WHERE pk IN :language_pks
+        """).bindparams(sqlalchemy.bindparam('language_pks', expanding=True)),
+        params)
+    DBSession.execute(
+        sqlalchemy.text("""
+            UPDATE variety
+            SET example_count = s.c
+            FROM (
+                SELECT language_pk, count(sentence.pk) AS c
+                FROM sentence
+                WHERE language_pk IN :language_pks
+                GROUP BY language_pk
+            ) AS s
+            WHERE variety.pk = s.language_pk
+        """).bindparams(sqlalchemy.bindparam('language_pks', expanding=True)),
+        params)
+
+
+def trigram_index_name(table, column):
+    return f'{table}_{column}_trgm'
+
+
+def create_search_indexes():
+    """Create trigram indexes for the substring searches of the data tables.
+
+    Building the indexes once all the data is in is a lot faster than
+    updating them with every insert.
+    """
+    for table, column in TRIGRAM_INDEXES:
+        DBSession.execute(sqlalchemy.text(f"""
+            CREATE INDEX IF NOT EXISTS {trigram_index_name(table, column)}
+            ON "{table}" USING gin ("{column}" gin_trgm_ops)
+        """))
+    for table in sorted({table for table, _ in TRIGRAM_INDEXES}):
+        DBSession.execute(sqlalchemy.text(f'ANALYZE "{table}"'))
+
+
+def _pks(model, condition):
+    table = model.__table__
+    return [
+        pk for pk, in DBSession.execute(
+            sqlalchemy.select(table.c.pk).where(condition(table.c)))]
+
+
+def _delete(model, pks):
+    # joined table inheritance: delete from the most specific table first
+    for mapper in sqlalchemy.inspect(model).iterate_to_root():
+        table = mapper.local_table
+        DBSession.execute(table.delete().where(table.c.pk.in_(pks)))
+
+
+def _delete_where(model, condition):
+    table = model.__table__
+    DBSession.execute(table.delete().where(condition(table.c)))
+
+
+def delete_contribution(contribution_pk):
+    """Delete a contribution and every row that belongs to it."""
+    valuesets = _pks(
+        common.ValueSet, lambda c: c.contribution_pk == contribution_pk)
+    values = _pks(common.Value, lambda c: c.valueset_pk.in_(valuesets))
+    _delete_where(common.ValueSentence, lambda c: c.value_pk.in_(values))
+    _delete_where(
+        common.ValueSetReference, lambda c: c.valueset_pk.in_(valuesets))
+    _delete(common.Value, values)
+    _delete(models.LValueSet, valuesets)
+
+    unitvalues = _pks(
+        common.UnitValue, lambda c: c.contribution_pk == contribution_pk)
+    _delete_where(
+        models.UnitValueSentence, lambda c: c.unitvalue_pk.in_(unitvalues))
+    _delete_where(
+        models.UnitValueReference, lambda c: c.unitvalue_pk.in_(unitvalues))
+    _delete(models.CValue, unitvalues)
+
+    constructions = _pks(
+        models.Construction, lambda c: c.contribution_pk == contribution_pk)
+    _delete_where(models.UnitSentence, lambda c: c.unit_pk.in_(constructions))
+    _delete_where(models.UnitReference, lambda c: c.unit_pk.in_(constructions))
+    _delete(models.Construction, constructions)
+
+    examples = _pks(
+        models.Example, lambda c: c.contribution_pk == contribution_pk)
+    _delete_where(
+        common.SentenceReference, lambda c: c.sentence_pk.in_(examples))
+    _delete_where(models.GlossToken, lambda c: c.example_pk.in_(examples))
+    _delete(models.Example, examples)
+
+    lparameters = _pks(
+        models.LParameter, lambda c: c.contribution_pk == contribution_pk)
+    _delete_where(
+        models.ParameterTopic, lambda c: c.parameter_pk.in_(lparameters))
+    _delete(
+        models.LCode,
+        _pks(common.DomainElement, lambda c: c.parameter_pk.in_(lparameters)))
+    _delete(models.LParameter, lparameters)
+
+    cparameters = _pks(
+        models.CParameter, lambda c: c.contribution_pk == contribution_pk)
+    _delete_where(
+        models.UnitParameterTopic,
+        lambda c: c.unitparameter_pk.in_(cparameters))
+    _delete(
+        models.CCode,
+        _pks(
+            common.UnitDomainElement,
+            lambda c: c.unitparameter_pk.in_(cparameters)))
+    _delete(models.CParameter, cparameters)
+
+    sources = _pks(
+        models.CrossgramDataSource,
+        lambda c: c.contribution_pk == contribution_pk)
+    _delete_where(
+        models.LanguageReference, lambda c: c.source_pk.in_(sources))
+    _delete(models.CrossgramDataSource, sources)
+
+    _delete_where(
+        models.ContributionLanguage,
+        lambda c: c.contribution_pk == contribution_pk)
+    _delete_where(
+        common.ContributionContributor,
+        lambda c: c.contribution_pk == contribution_pk)
+    _delete(models.CrossgramData, [contribution_pk])
+
+
+def delete_orphaned_languages(language_pks):
+    """Delete the languages no contribution uses anymore.
+
+    Only looks at the languages in `language_pks`.  Families left without
+    languages go, too.  Returns `(pk, id)` of the deleted languages.
+    """
+    # `NOT IN` is never true for a set with a NULL in it
+    used = sqlalchemy.union(*(
+        sqlalchemy.select(model.__table__.c.language_pk)
+        .where(model.__table__.c.language_pk.is_not(None))
+        for model in (
+            models.ContributionLanguage, common.ValueSet, common.Unit,
+            common.Sentence)))
+    orphans = DBSession.execute(
+        sqlalchemy.select(common.Language.pk, common.Language.id)
+        .where(common.Language.pk.in_(list(language_pks)))
+        .where(common.Language.pk.not_in(used))).all()
+    if not orphans:
+        return []
+    pks = [pk for pk, _ in orphans]
+
+    identifiers = _pks(
+        common.LanguageIdentifier, lambda c: c.language_pk.in_(pks))
+    identifier_pks = [
+        pk for pk, in DBSession.execute(
+            sqlalchemy.select(common.LanguageIdentifier.identifier_pk)
+            .where(common.LanguageIdentifier.pk.in_(identifiers)))]
+    _delete(common.LanguageIdentifier, identifiers)
+    # identifiers can be shared by several languages
+    _delete_where(
+        common.Identifier,
+        lambda c: c.pk.in_(identifier_pks) & c.pk.not_in(
+            sqlalchemy.select(common.LanguageIdentifier.identifier_pk)))
+
+    for model in (
+        models.LanguageReference, common.LanguageSource,
+        common.GlossAbbreviation,
+    ):
+        _delete_where(model, lambda c: c.language_pk.in_(pks))
+    for model in (common.Language_data, common.Language_files):
+        _delete_where(model, lambda c: c.object_pk.in_(pks))
+    family_pks = [
+        pk for pk, in DBSession.execute(
+            sqlalchemy.select(models.Variety.family_pk).distinct()
+            .where(models.Variety.pk.in_(pks))
+            .where(models.Variety.family_pk.is_not(None)))]
+    _delete(models.Variety, pks)
+    _delete_where(
+        Family,
+        lambda c: c.pk.in_(family_pks) & c.pk.not_in(
+            sqlalchemy.select(models.Variety.family_pk)
+            .where(models.Variety.family_pk.is_not(None))))
+    return orphans
 
 
 def make_toc(html_desc):
@@ -196,15 +695,31 @@ def make_toc(html_desc):
         return str(soup), None
 
 
-def main(_args):
+def zenodo_record_cache(args):
+    ttl = args.settings.get('crossgram.zenodo_cache_ttl')
+    return ZenodoRecordCache(
+        ZENODO_RECORD_CACHE,
+        ttl=int(ttl) * 24 * 60 * 60 if ttl else DEFAULT_RECORD_TTL,
+        offline=asbool(args.settings.get('crossgram.zenodo_offline')))
+
+
+def profile_path(args, command):
+    profile_dir = args.settings.get('crossgram.profile_dir')
+    profile_dir = pathlib.Path(profile_dir) if profile_dir else PROFILE_DIR
+    timestamp = datetime.now().strftime('%Y%m%d-%H%M%S')
+    return profile_dir / f'{command}-{timestamp}.json'
+
+
+def main(args):
     internal = input('[i]nternal or [e]xternal data (default: e): ').strip().lower() == 'i'
     which_submission = input("submission id or 'all' for all submissions (default: all): ").strip().lower() or 'all'
+    with ingest_profile(profile_path(args, 'initdb')):
+        import_all(args, internal, which_submission)
 
-    print('Loading glottolog...')
-    catconf = cldfcatalog.Config.from_file()
-    glottolog_path = catconf.get_clone('glottolog')
-    glottolog = Glottolog(glottolog_path)
-    languoids = {lg.id: lg for lg in glottolog.languoids()}
+
+def import_all(args, internal, which_submission):
+    with phase('glottolog'):
+        languoids = load_languoids()
 
     all_languages = {}
     all_contributors = {}
@@ -247,279 +762,209 @@ def main(_args):
             ord=number)
         for number, contributor in enumerate(all_contributors.values(), 1))
 
-    internal_repo = pathlib.Path('../../crossgram/crossgram-internal')
-    cache_dir = internal_repo / 'datasets'
-    cache_dir.mkdir(exist_ok=True)
-
-    grammaticon_repo = pathlib.Path('../grammaticon-data/csvw')
-    csv_topics = (
-        {k: v for k, v in csv_topic.items() if v}
-        for csv_topic in dsv.iterrows(
-            grammaticon_repo / 'concepts.csv', dicts=True))
-    topics = {
-        topic.get('Grammacode') or topic['ID']: models.Topic(
-            id=topic.get('Grammacode') or topic['ID'],
-            name=topic['Name'],
-            description=topic.get('Description'),
-            grammacode=topic.get('Grammacode'),
-            comment=topic.get('Comment'),
-            quotation=topic.get('Quotation'),
-            wikipedia_counterpart=topic.get('Wikipedia_Counterpart'),
-            wikipedia_url=topic.get('Wikipedia_URL'),
-            sil_counterpart=topic.get('SIL_Counterpart'),
-            sil_url=topic.get('SIL_URL'))
-        for topic in csv_topics}
+    topics = load_topics()
     DBSession.add_all(topics.values())
 
-    if internal:
-        submissions_path = internal_repo / 'submissions-internal'
-    else:
-        submissions_path = internal_repo / 'submissions'
+    submissions_path = submissions_dir(internal)
 
     # :D
     DBSession.execute(sqlalchemy.text("""
         ALTER TABLE parameter DROP CONSTRAINT parameter_name_key;
     """))
 
-    for contrib_dir in submissions_path.iterdir():
-        if not contrib_dir.is_dir():
-            continue
-        if which_submission != 'all' and which_submission != contrib_dir.name:
-            continue
-        sid = contrib_dir.name
-        print('Loading submission', sid, '...')
-
-        contrib_md = jsonlib.load(contrib_dir / 'md.json')
-        if contrib_md.get('hide'):
-            print('... but', sid, "doesn't want to be shown")
-            continue
-
-        cldfbench_path = download_data(sid, contrib_md, cache_dir)
-        if not cldfbench_path.exists():
-            print('could not find folder', str(cldfbench_path))
-            continue
-
-        doi = contrib_md.get('doi')
-        version = cldfzenodo.API.get_record(doi=doi).version if doi else None
-
-        submission = CLDFBenchSubmission.load(cldfbench_path, contrib_md)
-
-        date_match = re.fullmatch(r'(\d+)-(\d+)-(\d+)', contrib_md['published'])
-        assert date_match
-        yyyy, mm, dd = date_match.groups()
-        published = date(int(yyyy), int(mm), int(dd))
-
-        # strip ssh stuff off of git link
-        git_https = re.sub(
-            '^git@([^:]*):', r'https://\1/', contrib_md.get('repo') or '')
-
-        intro = (
-            maybe_read_file(contrib_dir / 'intro.md')
-            or maybe_read_file(cldfbench_path / 'raw' / 'intro.md')
-            or submission.readme)
-
-        contrib = models.CrossgramData(
-            id=sid,
-            number=int(contrib_md['number']),
-            published=published,
-            original_year=contrib_md.get('original-year') or str(published.year),
-            name=contrib_md.get('title') or submission.title,
-            doi=doi,
-            version=version,
-            git_repo=git_https,
-            description=intro)
-        DBSession.add(contrib)
-
-        DBSession.flush()
-
-        new_languages, new_contributors, new_families = submission.add_to_database(
-            contrib, all_languages, all_contributors, topics, languoids)
-        assert all(lg.id not in all_languages for lg in new_languages)
-        assert all(lg_id not in all_languages for lg_id in new_families)
-        assert all(c.id not in all_contributors for c in new_contributors)
-        all_languages.update(
-            (language.id, language)
-            for language in new_languages)
-        all_contributors.update(
-            (contributor.id, contributor)
-            for contributor in new_contributors)
-        all_families.update(new_families.items())
-
-        print('... done')
-
-    DBSession.flush()
+    with phase('downloads'):
+        to_load = fetch_submissions(
+            submissions_path, which_submission, CACHE_DIR,
+            int(args.settings.get('crossgram.download_workers') or 0))
+
+    # Parsing and validating the cldf data is the slow part, so it happens in
+    # a pool of worker processes.  The results still get added to the
+    # database one by one and in order.
+    parse_workers = int(args.settings.get('crossgram.parse_workers') or 0)
+    bulk = asbool(args.settings.get('crossgram.bulk_insert'))
+    zenodo_records = zenodo_record_cache(args)
+    with phase('submissions'), \
+            ProcessPoolExecutor(max_workers=parse_workers or None) as pool:
+        submissions = pool.map(
+            CLDFBenchSubmission.load,
+            [cldfbench_path for _, _, _, cldfbench_path in to_load],
+            [contrib_md for _, _, contrib_md, _ in to_load],
+            [PARSE_CACHE_DIR / sid for sid, _, _, _ in to_load])
+
+        for sid, contrib_dir, contrib_md, cldfbench_path in to_load:
+            with phase('submission', sid=sid):
+                # time spent waiting for the worker processes
+                with phase('load'):
+                    submission = next(submissions)
+                print('Loading submission', sid, '...')
+                with phase('add_to_database'):
+                    add_submission(
+                        sid, contrib_dir, contrib_md, cldfbench_path,
+                        submission, all_languages, all_contributors,
+                        all_families, topics, languoids, zenodo_records,
+                        bulk=bulk)
+                    DBSession.flush()
+                print('... done')
 
     print('Assigning language families...')
-
-    families, lang_family_map = make_families(all_families, all_languages, languoids)
-    DBSession.add_all(families.values())
-
-    DBSession.flush()
-
-    for language in all_languages.values():
-        if (family_id := lang_family_map.get(language.id)):
-            language.family_pk = families[family_id].pk
-
+    with phase('families'):
+        add_families(all_families, all_languages, languoids)
     print('... done')
 
-    print('Collecting language sources...')
-    collect_language_sources()
-    DBSession.flush()
+    print('Collecting parameters by topic...')
+    with phase('topics'):
+        denormalise_topics()
     print('... done')
 
     # formerly prime_cache
 
-    # TODO(johannes): remove when we move to showing *all* topics
-    used_topics = {
-        tuple_of_size_one[0]
-        for tuple_of_size_one in chain(
-            DBSession.execute(sqlalchemy.select(models.ParameterTopic.topic_pk).distinct()),
-            DBSession.execute(sqlalchemy.select(models.UnitParameterTopic.topic_pk).distinct()))}
-    for topic in DBSession.query(models.Topic):
-        topic.used = topic.pk in used_topics
-
     print('Parsing markdown intros...')
-    for contrib in DBSession.query(models.Contribution):
-        if contrib.description:
-            html_desc = markdown(contrib.description, extensions=['tables'])
-            desc, toc = make_toc(html_desc)
-            contrib.markup_description = desc
-            contrib.toc = toc
-        else:
-            contrib.markup_description = None
+    with phase('markdown'):
+        for contrib in DBSession.query(models.Contribution):
+            render_description(contrib)
     print('... done')
 
     print('Adding language info from glottolog...')
+    with phase('identifiers'):
+        add_language_identifiers(all_languages.values(), languoids)
+    with phase('denormalisation'):
+        denormalise_languages(all_languages.values())
+        DBSession.flush()
+    print('... done')
 
-    glottolog_languages = [
-        languoid
-        for language in all_languages.values()
-        if (languoid := languoids.get(language.id))]
-    glottocodes = {
-        languoid.id: common.Identifier(
-            id=languoid.id,
-            name=languoid.id,
-            type='glottolog')
-        for languoid in glottolog_languages}
-    isocodes = {
-        languoid.id: common.Identifier(
-            id=isocode,
-            name=isocode,
-            type='iso639-3')
-        for languoid in glottolog_languages
-        if (isocode := languoid.iso)}
-
-    DBSession.add_all(glottocodes.values())
-    DBSession.add_all(isocodes.values())
+    print('Creating search indexes...')
+    with phase('search_indexes'):
+        create_search_indexes()
+    with phase('example_search'):
+        update_search_vectors()
+    print('... done')
 
-    DBSession.flush()
+    generation = new_data_generation()
 
-    DBSession.add_all(
-        common.LanguageIdentifier(
-            language_pk=language.pk,
-            identifier_pk=identifier.pk)
-        for language in all_languages.values()
-        if (identifier := glottocodes.get(language.id)))
-    DBSession.add_all(
-        common.LanguageIdentifier(
-            language_pk=language.pk,
-            identifier_pk=identifier.pk)
-        for language in all_languages.values()
-        if (identifier := isocodes.get(language.id)))
+    print('Writing GeoJSON files...')
+    with phase('geojson'):
+        write_geojson(args, generation)
+    print('... done')
 
-    name_encoder = BlockEncoder()
-    source_encoder = BlockEncoder()
-    contrib_lang_query = DBSession.query(models.ContributionLanguage)\
-        .join(models.Language)
-    for contrib_lang in contrib_lang_query:
-        lang_id = contrib_lang.language.id
-        contrib_pk = contrib_lang.contribution_pk
-        name_encoder.record_value(
-            lang_id, contrib_pk, contrib_lang.custom_language_name)
-        source_encoder.record_value(
-            lang_id, contrib_pk, contrib_lang.source_comment)
 
-    for language in all_languages.values():
-        language.source_comments = source_encoder.encode(language.id)
-        language.custom_names = name_encoder.encode(
-            language.id, language.name)
+def reimport_submission(args, internal, sid):
+    with phase('downloads'):
+        to_load = fetch_submissions(submissions_dir(internal), sid, CACHE_DIR)
+    if not to_load:
+        print('could not find submission', sid)
+        return
+    [(sid, contrib_dir, contrib_md, cldfbench_path)] = to_load
 
-    DBSession.flush()
+    # parse the data *before* deleting anything
+    print('Parsing submission', sid, '...')
+    with phase('load'):
+        submission = CLDFBenchSubmission.load(
+            cldfbench_path, contrib_md, PARSE_CACHE_DIR / sid)
     print('... done')
 
-    print('Counting things...')
-
-    # language representation for l-parameters
-    DBSession.execute(sqlalchemy.text("""
-        UPDATE lparameter
-        SET language_count = s.c
-        FROM (
-            SELECT parameter_pk, count(distinct(language_pk)) AS c
-            FROM valueset
-            GROUP BY parameter_pk
-        ) AS s
-        WHERE lparameter.pk = s.parameter_pk
-    """))
+    affected_language_pks = set()
+    if (old_contrib := models.CrossgramData.get(sid, default=None)):
+        print('Deleting old version of', sid, '...')
+        with phase('delete'):
+            affected_language_pks.update(
+                pk for pk, in DBSession.execute(
+                    sqlalchemy.select(models.ContributionLanguage.language_pk)
+                    .where(models.ContributionLanguage.contribution_pk == old_contrib.pk)))
+            DBSession.flush()
+            delete_contribution(old_contrib.pk)
+            DBSession.expunge_all()
+        print('... done')
 
-    # language representation for l-parameter codes
-    DBSession.execute(sqlalchemy.text("""
-        UPDATE lcode
-        SET language_count = s.c
-        FROM (
-            SELECT domainelement_pk, count(distinct(language_pk)) AS c
-            FROM value
-            JOIN valueset ON valueset.pk = valueset_pk
-            WHERE domainelement_pk IS NOT NULL
-            GROUP BY domainelement_pk
-        ) AS s
-        WHERE lcode.pk = s.domainelement_pk
-    """))
+    with phase('glottolog'):
+        languoids = load_languoids()
+
+    all_languages = {
+        language.id: language
+        for language in DBSession.query(models.Variety)}
+    all_contributors = {
+        contributor.id: contributor
+        for contributor in DBSession.query(common.Contributor)}
+    topics = {topic.id: topic for topic in DBSession.query(models.Topic)}
+    existing_language_ids = set(all_languages)
+    new_families = {}
+
+    print('Loading submission', sid, '...')
+    with phase('add_to_database'):
+        add_submission(
+            sid, contrib_dir, contrib_md, cldfbench_path, submission,
+            all_languages, all_contributors, new_families, topics, languoids,
+            zenodo_record_cache(args),
+            bulk=asbool(args.settings.get('crossgram.bulk_insert')))
+        DBSession.flush()
+    print('... done')
 
-    # language representation for c-parameters
-    DBSession.execute(sqlalchemy.text("""
-        UPDATE cparameter
-        SET language_count = s.c
-        FROM (
-            SELECT unitparameter_pk, count(distinct(language_pk)) AS c
-            FROM unitvalue
-            JOIN unit ON unit.pk = unitvalue.unit_pk
-            GROUP BY unitparameter_pk
-        ) AS s
-        WHERE cparameter.pk = s.unitparameter_pk
-    """))
+    new_languages = {
+        language_id: language
+        for language_id, language in all_languages.items()
+        if language_id not in existing_language_ids}
+    contrib = models.CrossgramData.get(sid)
+    affected_language_pks.update(
+        pk for pk, in DBSession.execute(
+            sqlalchemy.select(models.ContributionLanguage.language_pk)
+            .where(models.ContributionLanguage.contribution_pk == contrib.pk)))
+
+    print('Deleting languages no contribution uses anymore...')
+    with phase('orphans'):
+        for language_pk, language_id in delete_orphaned_languages(
+            affected_language_pks
+        ):
+            print('  deleted language', language_id)
+            affected_language_pks.discard(language_pk)
+            DBSession.expunge(all_languages.pop(language_id))
+    print('... done')
 
-    # language representation for c-parameter codes
-    DBSession.execute(sqlalchemy.text("""
-        UPDATE ccode
-        SET language_count = s.c
-        FROM (
-            SELECT unitdomainelement_pk, count(distinct(language_pk)) AS c
-            FROM unitvalue
-            JOIN unit ON unit.pk = unitvalue.unit_pk
-            WHERE unitdomainelement_pk IS NOT NULL
-            GROUP BY unitdomainelement_pk
-        ) AS s
-        WHERE ccode.pk = s.unitdomainelement_pk
-    """))
+    affected_languages = [
+        language
+        for language in all_languages.values()
+        if language.pk in affected_language_pks]
+
+    print('Updating derived data...')
+    with phase('families'):
+        add_families(
+            new_families, new_languages, languoids,
+            {family.id: family for family in DBSession.query(Family)})
+    with phase('topics'):
+        mark_used_topics()
+        denormalise_topics()
+    with phase('markdown'):
+        render_description(contrib)
+    with phase('identifiers'):
+        add_language_identifiers(new_languages.values(), languoids)
+    with phase('denormalisation'):
+        denormalise_languages(affected_languages, only_these=True)
+        DBSession.flush()
+    with phase('counts'):
+        count_examples(affected_language_pks)
+        DBSession.flush()
+    with phase('example_search'):
+        update_search_vectors(contrib.pk)
+    print('... done')
 
-    # examples per language
-    DBSession.execute(sqlalchemy.text("""
-        UPDATE variety
-        SET example_count = s.c
-        FROM (
-            SELECT language_pk, count(sentence.pk) AS c
-            FROM sentence
-            GROUP BY language_pk
-        ) AS s
-        WHERE variety.pk = s.language_pk
-    """))
+    generation = new_data_generation()
 
-    DBSession.flush()
+    print('Writing GeoJSON files...')
+    with phase('geojson'):
+        write_geojson(args, generation)
     print('... done')
 
 
 def prime_cache(args):
-    """If data needs to be denormalized for lookup, do that here.
-    This procedure should be separate from the db initialization, because
-    it will have to be run periodically whenever data has been updated.
+    """Re-import a single submission into an existing database.
+
+    Run as `clld initdb --prime-cache-only development.ini`, which leaves
+    the existing database intact.  The contribution is replaced along with
+    all its data, while languages and contributors are reused.
     """
+    if not args.prime_cache_only:
+        # the database was just built from scratch
+        return
+    internal = input('[i]nternal or [e]xternal data (default: e): ').strip().lower() == 'i'
+    sid = input('submission id to re-import: ').strip().lower()
+    if sid:
+        with ingest_profile(profile_path(args, f'reimport-{sid}')):
+            reimport_submission(args, internal, sid)
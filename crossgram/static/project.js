@@ -1 +1,62 @@
+var CROSSGRAM = {};
 
+/**
+ * Fill the (empty) per-code layers of a parameter map from a single GeoJSON
+ * response.  Each feature has the index of its code in the `domain` of the
+ * feature collection (see `crossgram.maps.LParameterMap`).
+ */
+CROSSGRAM.splitCodeLayers = function(map) {
+    var name, props, url,
+        layers = {};
+
+    for (name in map.layer_geojson) {
+        if (map.layer_geojson.hasOwnProperty(name)) {
+            props = map.layer_geojson[name].properties;
+            if (props && props.code !== undefined) {
+                layers[props.code] = map.layer_map[name];
+                url = props.data;
+                // the GeoJSON legend shows the data of a single code
+                map.layer_geojson[name] = props.url;
+            }
+        }
+    }
+    if (url === undefined) {
+        return;
+    }
+
+    $.getJSON(url, function(data) {
+        var i, feature, bounds;
+
+        for (i = 0; i < data.features.length; i++) {
+            feature = data.features[i];
+            if (layers[feature.properties.code] !== undefined) {
+                layers[feature.properties.code].addData(feature);
+            }
+        }
+
+        // same as what `CLLD.Map` does after loading a layer
+        if (!map.options.center) {
+            for (name in map.layer_map) {
+                if (map.layer_map.hasOwnProperty(name)
+                    && !map.options.exclude_from_zoom.includes(name)
+                    && map.layer_map[name].getBounds().isValid()) {
+                    if (bounds) {
+                        bounds.extend(map.layer_map[name].getBounds());
+                    } else {
+                        bounds = L.latLngBounds(map.layer_map[name].getBounds());
+                    }
+                }
+            }
+            if (bounds) {
+                map.map.fitBounds(bounds, map.options.zoom ? {maxZoom: map.options.zoom} : {});
+            }
+        }
+        if (map.options.show_labels) {
+            map.eachMarker(function(marker, lid) {
+                if (!('lids' in window) || lids.includes(lid)) {
+                    marker.openTooltip();
+                }
+            });
+        }
+    });
+};
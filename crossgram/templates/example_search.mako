@@ -0,0 +1,48 @@
+<%inherit file="${context.get('request').registry.settings.get('clld.app_template', 'app.mako')}"/>
+<%namespace name="util" file="util.mako"/>
+<%! active_menu_item = "example_search" %>
+<%block name="title">Search examples</%block>
+
+<%def name="page_link(n, label)">
+<a href="${req.route_url('example_search', _query={'q': query, 'page': n})}">${label}</a>
+</%def>
+
+<h2>${title()}</h2>
+
+<form class="form-inline" method="get" action="${req.route_url('example_search')}">
+    <input type="text" name="q" value="${query}" class="input-xxlarge"
+           placeholder='e.g. dog bark, "give the book", dual -pronoun'/>
+    <button type="submit" class="btn">Search</button>
+</form>
+
+<p><em>
+    Searches the translations, primary texts, glosses and comments of the
+    examples in all contributions.  Matches in the translation rank highest.
+</em></p>
+
+% if query:
+<p>${total} example${'' if total == 1 else 's'} found.</p>
+
+% for example in examples:
+<div class="well well-small">
+    <p>
+        ${h.link(request, example, label=f'Example {example.id}')}
+        &mdash; ${h.link(request, example.language)}
+        in ${h.link(request, example.contribution)}
+    </p>
+    ${h.rendered_sentence(example)|n}
+</div>
+% endfor
+
+% if pages > 1:
+<ul class="pager">
+    % if page > 1:
+    <li class="previous">${page_link(page - 1, '← Previous')}</li>
+    % endif
+    <li>Page ${page} of ${pages}</li>
+    % if page < pages:
+    <li class="next">${page_link(page + 1, 'Next →')}</li>
+    % endif
+</ul>
+% endif
+% endif
@@ -0,0 +1,19 @@
+<%inherit file="${context.get('request').registry.settings.get('clld.app_template', 'app.mako')}"/>
+<%namespace name="util" file="util.mako"/>
+<%! active_menu_item = "glosstokens" %>
+<%block name="title">Search glosses</%block>
+
+<h2>${title()}</h2>
+
+<p><em>
+    Enter a gloss morpheme such as <code>PST</code> or <code>ERG</code> in the
+    <strong>Morpheme</strong> column to find every word glossed with exactly
+    this morpheme, in the examples of all contributions.  Morphemes are the
+    parts of a gloss separated by <code>-</code>, <code>=</code>,
+    <code>.</code>, <code>:</code>, <code>~</code>, <code>\</code> or
+    <code>&lt;&gt;</code>, and they are case-sensitive.
+</em></p>
+
+<div>
+    ${datatable.render()}
+</div>
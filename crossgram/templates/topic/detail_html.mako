@@ -1,7 +1,6 @@
 <%inherit file="../${context.get('request').registry.settings.get('clld.app_template', 'app.mako')}"/>
 <%namespace name="util" file="../util.mako"/>
 <%! active_menu_item = "topics" %>
-<% import crossgram.models as m %>
 <%block name="title">${_('Topic')} ${ctx.name or ctx.id}</%block>
 
 <h2>${_('Topic')}: ${ctx.name or ctx.id}</h2>
@@ -41,32 +40,22 @@
 </dl>
 % endif
 
-% if ctx.parameter_assocs:
-<h3>Associated ${_('Parameters')}</h3>
-<% query = h.DBSession.query(m.LParameter) \
-     .join(m.ParameterTopic) \
-     .join(m.LParameter.contribution) \
-     .filter(m.ParameterTopic.topic == ctx) \
-     .distinct()
-%>
+<%def name="parameter_list(links, css_class)">
 <ul>
-  % for param in query:
-  <li>${h.link(req, param)} (from ${h.link(req, param.contribution)})</li>
+  % for param in links:
+  <li><a class="${css_class}" href="${req.route_url(param.route, id=param.id)}" title="${param.name}">${param.name}</a> (from <a class="Contribution" href="${req.route_url('contribution', id=param.contribution_id)}" title="${param.contribution_name}">${param.contribution_name}</a>)</li>
   % endfor
 </ul>
+</%def>
+
+<% lparameters = ctx.parameter_links('parameter') %>
+% if lparameters:
+<h3>Associated ${_('Parameters')}</h3>
+${parameter_list(lparameters, 'Parameter')}
 % endif
 
-% if ctx.unitparameter_assocs:
+<% cparameters = ctx.parameter_links('unitparameter') %>
+% if cparameters:
 <h3>Associated ${_('Unit Parameters')}</h3>
-<% query = h.DBSession.query(m.CParameter) \
-     .join(m.UnitParameterTopic) \
-     .join(m.CParameter.contribution) \
-     .filter(m.UnitParameterTopic.topic == ctx) \
-     .distinct()
-%>
-<ul>
-  % for param in query:
-  <li>${h.link(req, param)} (from ${h.link(req, param.contribution)})</li>
-  % endfor
-</ul>
+${parameter_list(cparameters, 'UnitParameter')}
 % endif
@@ -0,0 +1,148 @@
+import transaction
+from clld.db.meta import Base, DBSession
+from pycldf import StructureDataset
+from sqlalchemy import select
+
+from crossgram import models
+from crossgram.lib.cldf import CLDFBenchSubmission
+
+TERMS = 'http://cldf.clld.org/v1.0/terms.rdf#'
+
+
+def make_dataset(
+    path, language_count=3, glottocodes=None, changed_values=None,
+    parameter_name='Parameter',
+):
+    ds = StructureDataset.in_dir(path / 'cldf')
+    ds.add_component('LanguageTable')
+    ds.add_component('ParameterTable')
+    ds.add_component('CodeTable')
+    ds.add_component('ExampleTable')
+    ds.add_columns('LanguageTable', {
+        'name': 'Source', 'propertyUrl': TERMS + 'source', 'separator': ';'})
+    ds.add_columns('ValueTable', {
+        'name': 'Example_IDs',
+        'propertyUrl': TERMS + 'exampleReference',
+        'separator': ';'})
+    ds.add_table(
+        'constructions.csv',
+        {'name': 'ID', 'propertyUrl': TERMS + 'id'},
+        {'name': 'Name', 'propertyUrl': TERMS + 'name'},
+        {'name': 'Description', 'propertyUrl': TERMS + 'description'},
+        {'name': 'Language_ID', 'propertyUrl': TERMS + 'languageReference'},
+        {'name': 'Source', 'propertyUrl': TERMS + 'source', 'separator': ';'})
+    ds.add_table(
+        'cvalues.csv',
+        {'name': 'ID', 'propertyUrl': TERMS + 'id'},
+        'Construction_ID',
+        {'name': 'Parameter_ID', 'propertyUrl': TERMS + 'parameterReference'},
+        {'name': 'Value', 'propertyUrl': TERMS + 'value'},
+        {'name': 'Code_ID', 'propertyUrl': TERMS + 'codeReference'},
+        {'name': 'Source', 'propertyUrl': TERMS + 'source', 'separator': ';'},
+        {
+            'name': 'Example_IDs',
+            'propertyUrl': TERMS + 'exampleReference',
+            'separator': ';',
+        })
+    ds.add_sources(
+        '@book{meier2000,\n  author = {Meier, A.},\n'
+        '  title = {The Title},\n  year = {2000}\n}')
+
+    languages = [
+        {
+            'ID': f'l{i}',
+            'Name': f'Language {i}',
+            'Glottocode': glottocodes[i] if glottocodes else None,
+            'Source': ['meier2000[12]'],
+        }
+        for i in range(language_count)]
+    parameters = [
+        {'ID': f'p{i}', 'Name': f'{parameter_name} {i}', 'Description': 'd'}
+        for i in range(3)]
+    parameters.append({'ID': 'cp', 'Name': 'Construction parameter'})
+    codes = [
+        {'ID': f'p{i}-{j}', 'Parameter_ID': f'p{i}', 'Name': f'code {j}'}
+        for i in range(3)
+        for j in range(2)]
+    codes.append({'ID': 'cp-0', 'Parameter_ID': 'cp', 'Name': 'code 0'})
+    examples = [
+        {
+            'ID': f'e{i}',
+            'Language_ID': 'l0',
+            'Primary_Text': f'text {i}',
+            'Analyzed_Word': ['a', 'b'],
+            'Gloss': ['PST', 'ERG'],
+            'Translated_Text': f'translation {i}',
+        }
+        for i in range(4)]
+    values = [
+        {
+            'ID': f'v{lang}-{param}',
+            'Language_ID': f'l{lang}',
+            'Parameter_ID': f'p{param}',
+            'Code_ID': f'p{param}-{(lang + param) % 2}',
+            'Value': (changed_values or {}).get(f'v{lang}-{param}', 'x'),
+            'Source': ['meier2000[3]'],
+            'Example_IDs': ['e0', 'e1'],
+        }
+        for lang in range(language_count)
+        for param in range(3)]
+    constructions = [
+        {
+            'ID': f'k{i}',
+            'Name': f'Construction {i}',
+            'Language_ID': f'l{i}',
+            'Source': ['meier2000'],
+        }
+        for i in range(language_count)]
+    cvalues = [
+        {
+            'ID': f'cv{i}',
+            'Construction_ID': f'k{i}',
+            'Parameter_ID': 'cp',
+            'Value': 'y',
+            'Code_ID': 'cp-0' if i else None,
+            'Source': ['meier2000[1]'],
+            'Example_IDs': ['e2', 'e3'],
+        }
+        for i in range(language_count)]
+    ds.write(
+        LanguageTable=languages,
+        ParameterTable=parameters,
+        CodeTable=codes,
+        ExampleTable=examples,
+        ValueTable=values,
+        **{'constructions.csv': constructions, 'cvalues.csv': cvalues})
+    (path / 'README.md').write_text('# Test dataset', encoding='utf-8')
+    return path
+
+
+def import_and_dump(path, bulk):
+    """Import a submission and return the rows of all tables."""
+    submission = CLDFBenchSubmission.load(path, {'authors': ['Anne Author']})
+    try:
+        contribution = models.CrossgramData(id='c1', number=1, name='c1')
+        DBSession.add(contribution)
+        DBSession.flush()
+        submission.add_to_database(contribution, {}, {}, {}, {}, bulk=bulk)
+        DBSession.flush()
+        return {
+            table.name: DBSession.execute(
+                select(*(
+                    column
+                    for column in table.columns
+                    if column.name not in ('created', 'updated')))
+                .order_by(*table.primary_key.columns)
+            ).all()
+            for table in Base.metadata.sorted_tables}
+    finally:
+        transaction.abort()
+        # let the app of other tests bind the session to its own database
+        DBSession.remove()
+
+
+def test_bulk_insert(db, tmp_path):
+    path = make_dataset(tmp_path)
+    rows = import_and_dump(path, bulk=False)
+    assert rows['value'] and rows['sentence'] and rows['unitvalue']
+    assert import_and_dump(path, bulk=True) == rows
@@ -0,0 +1,84 @@
+import json
+import time
+import urllib.error
+from types import SimpleNamespace
+
+import pytest
+
+from crossgram.lib.cldf_zenodo import ZenodoRecordCache
+
+DOI = '10.5281/zenodo.1234'
+TTL = 60 * 60
+
+
+class FakeAPI:
+    def __init__(self, version='v2.0', error=None):
+        self.version = version
+        self.error = error
+        self.requests = []
+
+    def get_record(self, doi):
+        self.requests.append(doi)
+        if self.error:
+            raise self.error
+        return SimpleNamespace(
+            version=self.version, title='Dataset', concept_doi='10.5281/zenodo.1')
+
+
+@pytest.fixture
+def cache_file(tmp_path):
+    def write(age):
+        path = tmp_path / 'zenodo-records.json'
+        path.write_text(json.dumps({DOI: {
+            'retrieved': time.time() - age,
+            'version': 'v1.0',
+            'title': 'Dataset',
+            'concept_doi': '10.5281/zenodo.1',
+        }}), encoding='utf-8')
+        return path
+    return write
+
+
+def test_fresh(cache_file):
+    api = FakeAPI()
+    cache = ZenodoRecordCache(cache_file(TTL / 2), ttl=TTL, api=api)
+    assert cache.version(DOI) == 'v1.0'
+    assert not api.requests
+
+
+def test_expired(cache_file):
+    api = FakeAPI()
+    path = cache_file(2 * TTL)
+    cache = ZenodoRecordCache(path, ttl=TTL, api=api)
+    assert cache.version(DOI) == 'v2.0'
+    assert api.requests == [DOI]
+    # the new metadata is saved and fresh again
+    api = FakeAPI(version='v3.0')
+    assert ZenodoRecordCache(path, ttl=TTL, api=api).version(DOI) == 'v2.0'
+    assert not api.requests
+
+
+@pytest.mark.parametrize('error', [
+    urllib.error.URLError('no network'),
+    urllib.error.HTTPError(
+        'https://zenodo.org', 503, 'Service Unavailable', {}, None),
+    TimeoutError('timed out'),
+])
+def test_expired_network_error(cache_file, capsys, error):
+    api = FakeAPI(error=error)
+    cache = ZenodoRecordCache(cache_file(2 * TTL), ttl=TTL, api=api)
+    assert cache.version(DOI) == 'v1.0'
+    assert api.requests == [DOI]
+    assert 'warning' in capsys.readouterr().out
+    # unknown records can't do without zenodo
+    with pytest.raises(OSError):
+        cache.version('10.5281/zenodo.5678')
+
+
+def test_offline(cache_file):
+    api = FakeAPI()
+    cache = ZenodoRecordCache(
+        cache_file(2 * TTL), ttl=TTL, offline=True, api=api)
+    assert cache.version(DOI) == 'v1.0'
+    assert cache.version('10.5281/zenodo.5678') is None
+    assert not api.requests
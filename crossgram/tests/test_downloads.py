@@ -0,0 +1,71 @@
+import threading
+
+import git
+from clldutils import jsonlib
+
+from crossgram.scripts.initializedb import fetch_submissions
+
+
+def make_repo(path, readme):
+    repo = git.Repo.init(str(path))
+    (path / 'cldf').mkdir()
+    (path / 'README.md').write_text(readme, encoding='utf-8')
+    repo.index.add(['README.md'])
+    repo.index.commit('initial commit')
+    return repo
+
+
+def add_submission(submissions, sid, md):
+    (submissions / sid).mkdir(parents=True)
+    jsonlib.dump(md, submissions / sid / 'md.json')
+
+
+def test_fetch_submissions(tmp_path):
+    submissions = tmp_path / 'submissions'
+    cache_dir = tmp_path / 'datasets'
+    cache_dir.mkdir()
+
+    latest = make_repo(tmp_path / 'latest', 'v1')
+    pinned = make_repo(tmp_path / 'pinned', 'v1')
+    first_commit = pinned.head.commit.hexsha
+    (tmp_path / 'pinned' / 'README.md').write_text('v2', encoding='utf-8')
+    pinned.index.add(['README.md'])
+    pinned.index.commit('second commit')
+
+    add_submission(submissions, 'latest', {'repo': (tmp_path / 'latest').as_uri()})
+    add_submission(submissions, 'pinned', {
+        'repo': (tmp_path / 'pinned').as_uri(), 'checkout': first_commit})
+    add_submission(submissions, 'zenodo', {'doi': '10.5281/zenodo.1234'})
+    add_submission(submissions, 'hidden', {'doi': '10.5281/zenodo.5678', 'hide': True})
+
+    doi_downloads = []
+    threads = set()
+
+    def fake_doi_resolver(doi, outdir):
+        doi_downloads.append(doi)
+        threads.add(threading.get_ident())
+        (outdir / 'dataset' / 'cldf').mkdir(parents=True)
+        return outdir
+
+    to_load = fetch_submissions(
+        submissions, 'all', cache_dir, workers=3,
+        download_doi=fake_doi_resolver)
+    paths = {sid: path for sid, _, _, path in to_load}
+    assert sorted(paths) == ['latest', 'pinned', 'zenodo']
+    assert doi_downloads == ['10.5281/zenodo.1234']
+    assert threads and threading.get_ident() not in threads
+    assert (paths['latest'] / 'README.md').read_text(encoding='utf-8') == 'v1'
+    assert (paths['pinned'] / 'README.md').read_text(encoding='utf-8') == 'v1'
+    assert (paths['zenodo'] / 'dataset' / 'cldf').exists()
+
+    # second run: zenodo data is cached, unpinned repos get pulled
+    (tmp_path / 'latest' / 'README.md').write_text('v2', encoding='utf-8')
+    latest.index.add(['README.md'])
+    latest.index.commit('second commit')
+
+    to_load = fetch_submissions(
+        submissions, 'all', cache_dir, download_doi=fake_doi_resolver)
+    paths = {sid: path for sid, _, _, path in to_load}
+    assert doi_downloads == ['10.5281/zenodo.1234']
+    assert (paths['latest'] / 'README.md').read_text(encoding='utf-8') == 'v2'
+    assert (paths['pinned'] / 'README.md').read_text(encoding='utf-8') == 'v1'
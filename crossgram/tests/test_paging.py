@@ -0,0 +1,77 @@
+import pytest
+from sqlalchemy import Column, Integer, Unicode, create_engine
+from sqlalchemy.orm import Session, declarative_base
+
+from crossgram.lib.paging import seek_page
+
+Base = declarative_base()
+
+
+class Row(Base):
+    __tablename__ = 'row'
+    pk = Column(Integer, primary_key=True)
+    name = Column(Unicode)
+    number = Column(Integer)
+
+
+ROWS = [
+    ('b', 2), (None, 1), ('a', None), ('b', 1), (None, None), ('c', 3),
+    ('a', 2), ('b', None), (None, 2), ('a', 1), ('c', None), ('b', 2),
+]
+
+
+@pytest.fixture
+def session():
+    engine = create_engine('sqlite://')
+    Base.metadata.create_all(engine)
+    with Session(engine) as session:
+        session.add_all(
+            Row(pk=pk, name=name, number=number)
+            for pk, (name, number) in enumerate(ROWS, start=1))
+        session.commit()
+        yield session
+
+
+ORDERINGS = [
+    [('name', False), ('pk', False)],
+    [('name', True), ('pk', False)],
+    [('number', True), ('name', False), ('pk', False)],
+    [('number', False), ('name', True), ('pk', False)],
+]
+
+
+@pytest.mark.parametrize('ordering', ORDERINGS)
+@pytest.mark.parametrize('limit', [1, 2, 3, 5, 20])
+def test_seek_page(session, ordering, limit):
+    expressions = [(getattr(Row, attr), desc) for attr, desc in ordering]
+    everything, _ = seek_page(session.query(Row), expressions, len(ROWS) + 1)
+    assert len(everything) == len(ROWS)
+
+    # go from page to page like `SeekPagingMixin`: seek if possible,
+    # otherwise skip rows
+    pages, offset, cursor = [], 0, None
+    while True:
+        items, cursor = seek_page(
+            session.query(Row), expressions, limit, offset, cursor)
+        if not items:
+            break
+        pages.extend(items)
+        offset += limit
+    assert [row.pk for row in pages] == [row.pk for row in everything]
+
+    # seeking alone, from every single row
+    for index, row in enumerate(everything[:-1]):
+        cursor = tuple(getattr(row, attr) for attr, _ in ordering)
+        if any(value is None for value in cursor):
+            continue
+        items, _ = seek_page(session.query(Row), expressions, limit, cursor=cursor)
+        assert items == everything[index + 1:index + 1 + limit]
+
+
+def test_null_order(session):
+    rows, _ = seek_page(
+        session.query(Row), [(Row.name, False), (Row.pk, False)], 100)
+    assert [row.name for row in rows][-3:] == [None, None, None]
+    rows, _ = seek_page(
+        session.query(Row), [(Row.name, True), (Row.pk, False)], 100)
+    assert [row.name for row in rows][:3] == [None, None, None]
@@ -0,0 +1,45 @@
+from pycldf import StructureDataset
+
+from crossgram.lib import cldf
+from crossgram.lib.cldf import CLDFBenchSubmission, StreamedTable, record_to_tuple
+from crossgram.tests.test_bulk_insert import make_dataset
+
+CONTRIB_MD = {'authors': ['Anne Author']}
+
+
+def contents(submission):
+    return (
+        {name: list(rows) for name, rows in submission.tables.items()},
+        [record_to_tuple(record) for record in submission.sources.records],
+        submission.authors,
+        submission.title,
+        submission.readme)
+
+
+def test_parse_cache(tmp_path, mocker):
+    path = make_dataset(tmp_path)
+    cache_dir = tmp_path / 'parsed' / 'c1'
+    uncached = contents(CLDFBenchSubmission.load(path, CONTRIB_MD))
+    assert uncached[0]['ValueTable'] and uncached[1]
+
+    parse_cldf = mocker.spy(cldf, 'parse_cldf')
+    first = CLDFBenchSubmission.load(path, CONTRIB_MD, cache_dir)
+    second = CLDFBenchSubmission.load(path, CONTRIB_MD, cache_dir)
+    assert parse_cldf.call_count == 1
+    assert isinstance(second.tables['ValueTable'], StreamedTable)
+    assert contents(first) == uncached
+    assert contents(second) == uncached
+
+    # only the latest version of the data is kept
+    [old_entry] = cache_dir.iterdir()
+    dataset = StructureDataset.from_metadata(
+        path / 'cldf' / 'StructureDataset-metadata.json')
+    dataset.add_sources(
+        '@book{schulze2010,\n  author = {Schulze, B.},\n'
+        '  title = {Another Title},\n  year = {2010}\n}')
+    dataset.write_sources()
+    changed = CLDFBenchSubmission.load(path, CONTRIB_MD, cache_dir)
+    assert len(changed.sources.records) == 2
+    assert [p.name for p in cache_dir.iterdir()] == [
+        cldf.cldf_dir_hash(path / 'cldf')]
+    assert not old_entry.exists()
@@ -0,0 +1,165 @@
+import re
+from types import SimpleNamespace
+
+import pytest
+import transaction
+from clld.db.meta import Base, DBSession
+from clld_glottologfamily_plugin.util import Family
+from sqlalchemy import func, select
+
+from crossgram import models
+from crossgram.lib.glottolog_index import GlottologIndex
+from crossgram.scripts import initializedb
+from crossgram.tests.test_bulk_insert import make_dataset
+
+GLOTTOCODES = ['abcd1234', 'efgh1234', 'ijkl1234']
+
+
+def languoid(id_, name, level, family=None, iso=None):
+    return SimpleNamespace(
+        id=id_, name=name, latitude=None, longitude=None, macroareas=[],
+        level=level, iso=iso,
+        lineage=[(family[1], family[0], 'family')] if family else [])
+
+
+@pytest.fixture
+def reimport(db, tmp_path, mocker):
+    # the app of an earlier test may have bound the session to its database
+    DBSession.remove()
+    DBSession.configure(bind=db)
+    first = ('fami1234', 'First Family')
+    second = ('famj1234', 'Second Family')
+    languoids = GlottologIndex.build(tmp_path / 'glottolog.sqlite', [
+        languoid(*first, 'family'),
+        languoid(*second, 'family'),
+        languoid('abcd1234', 'Abcd', 'language', first, 'abc'),
+        languoid('efgh1234', 'Efgh', 'language', first, 'efg'),
+        languoid('ijkl1234', 'Ijkl', 'language', second, 'ijk'),
+    ])
+    datasets = {}
+    mocker.patch.object(
+        initializedb, 'fetch_submissions',
+        side_effect=lambda _, sid, __: [datasets[sid]])
+    mocker.patch.object(initializedb, 'PARSE_CACHE_DIR', tmp_path / 'parsed')
+    mocker.patch.object(initializedb, 'load_languoids', return_value=languoids)
+    mocker.patch.object(initializedb, 'zenodo_record_cache')
+    # full-text search and GeoJSON files need PostgreSQL and a web app
+    mocker.patch.object(initializedb, 'update_search_vectors')
+    mocker.patch.object(initializedb, 'write_geojson')
+
+    def run(sid, number, path):
+        contrib_md = {
+            'number': number,
+            'title': sid,
+            'published': '2024-01-01',
+            'authors': ['Anne Author'],
+        }
+        datasets[sid] = (sid, tmp_path, contrib_md, path)
+        initializedb.reimport_submission(
+            SimpleNamespace(settings={}), False, sid)
+
+    yield run
+    languoids.close()
+
+
+def dump():
+    """Return the rows of all tables, with pks replaced by ids."""
+    DBSession.flush()
+    tables = [
+        table for table in Base.metadata.sorted_tables
+        if table.name != 'config']
+    rows = {
+        table.name: DBSession.execute(select(table)).all()
+        for table in tables}
+
+    # parents come before the tables that reference them
+    ids = {}
+    for table in tables:
+        parents = [fk.column.table.name for fk in table.c.pk.foreign_keys]
+        ids[table.name] = {
+            row.pk: (
+                row.id if 'id' in table.c
+                else ids[parents[0]][row.pk] if parents
+                else None)
+            for row in rows[table.name]}
+
+    def contribution_id(match):
+        pk = int(match.group(1))
+        assert pk in ids['contribution'], 'a deleted contribution is left'
+        return f'█{ids["contribution"][pk]}▒'
+
+    def normalise(column, value):
+        if value is None:
+            return None
+        for fk in column.foreign_keys:
+            target = fk.column.table.name
+            assert value in ids[target], f'{column} references a deleted row'
+            return ids[target][value]
+        if column.primary_key:
+            return ids[column.table.name][value]
+        if isinstance(value, str):
+            # see `crossgram.lib.horrible_denormaliser`
+            return re.sub('█([0-9]+)▒', contribution_id, value)
+        return value
+
+    return {
+        table.name: sorted(
+            (
+                tuple(
+                    normalise(column, value)
+                    for column, value in zip(table.columns, row)
+                    if column.name not in ('created', 'updated'))
+                for row in rows[table.name]),
+            key=repr)
+        for table in tables}
+
+
+def references(table_name, pk):
+    return sum(
+        DBSession.execute(
+            select(func.count()).select_from(table).where(column == pk)
+        ).scalar()
+        for table in Base.metadata.sorted_tables
+        for column in table.columns
+        for fk in column.foreign_keys
+        if fk.column.table.name == table_name)
+
+
+def dataset(path, **kwargs):
+    path.mkdir()
+    return make_dataset(path, **kwargs)
+
+
+def test_reimport(tmp_path, reimport):
+    old = dataset(tmp_path / 'old', glottocodes=GLOTTOCODES)
+    new = dataset(
+        tmp_path / 'new', language_count=2, glottocodes=GLOTTOCODES,
+        changed_values={'v0-1': 'changed'})
+    other = dataset(tmp_path / 'other', parameter_name='Other parameter')
+
+    try:
+        reimport('other', '1', other)
+        reimport('c1', '2', new)
+        fresh = dump()
+    finally:
+        transaction.abort()
+        DBSession.remove()
+
+    try:
+        reimport('c1', '2', old)
+        old_pk = models.CrossgramData.get('c1').pk
+        assert DBSession.query(Family).count() == 2
+        # the new version gets pks that can't be mixed up with the old ones
+        reimport('other', '1', other)
+        reimport('c1', '2', new)
+
+        assert models.CrossgramData.get('c1').pk != old_pk
+        assert not references('contribution', old_pk)
+        assert not references('crossgramdata', old_pk)
+        assert models.Variety.get('ijkl1234', default=None) is None
+        assert DBSession.query(Family).count() == 1
+        assert dump() == fresh
+    finally:
+        transaction.abort()
+        # let the app of other tests bind the session to its own database
+        DBSession.remove()
@@ -0,0 +1,122 @@
+import gzip
+import json
+
+import pytest
+from pyramid.request import Request
+
+from crossgram.lib import static_geojson
+from crossgram.lib.static_geojson import (
+    GeoJsonFiles, INDEX_FILE, _write_compressed, geojson_path,
+    replace_directory)
+
+GENERATION = '2024-01-01T00:00:00-abcdef12'
+
+
+def geojson(layer):
+    return json.dumps({
+        'type': 'FeatureCollection',
+        'properties': {'layer': layer},
+        'features': [],
+    }).encode('utf-8')
+
+
+def write_files(directory, application_url='http://localhost'):
+    _write_compressed(geojson_path(directory, 'p1'), geojson('p1'))
+    _write_compressed(geojson_path(directory, 'p1', 'p1-c1'), geojson('p1-c1'))
+    (directory / INDEX_FILE).write_text(json.dumps({
+        'application_url': application_url,
+        'generation': GENERATION,
+    }), encoding='utf-8')
+
+
+@pytest.fixture
+def files(tmp_path, mocker):
+    mocker.patch.object(
+        static_geojson, 'data_generation', return_value=GENERATION)
+    write_files(tmp_path)
+    return GeoJsonFiles(tmp_path, max_age=3600)
+
+
+def get(files, path, **headers):
+    return files.response(Request.blank(path, headers=headers))
+
+
+def test_encodings(files):
+    response = get(files, '/parameters/p1.geojson?layer=p1')
+    assert response.content_encoding is None
+    assert json.loads(response.body)['properties']['layer'] == 'p1'
+    assert response.etag == f'{GENERATION}-identity'
+    assert response.cache_control.public
+    assert response.cache_control.max_age == 3600
+    assert response.vary == ('Accept-Encoding',)
+
+    response = get(
+        files, '/parameters/p1.geojson', **{'Accept-Encoding': 'gzip, deflate'})
+    assert response.content_encoding == 'gzip'
+    assert json.loads(gzip.decompress(response.body)) == json.loads(geojson('p1'))
+    assert response.etag == f'{GENERATION}-gzip'
+
+    response = get(
+        files, '/parameters/p1.geojson', **{'Accept-Encoding': 'gzip;q=0'})
+    assert response.content_encoding is None
+
+
+def test_brotli(files):
+    brotli = pytest.importorskip('brotli')
+    response = get(
+        files, '/parameters/p1.geojson', **{'Accept-Encoding': 'gzip, br'})
+    assert response.content_encoding == 'br'
+    assert json.loads(brotli.decompress(response.body)) == json.loads(geojson('p1'))
+
+
+def test_domainelement(files):
+    response = get(
+        files, '/parameters/p1.geojson?domainelement=p1-c1&layer=p1-c1')
+    assert json.loads(response.body)['properties']['layer'] == 'p1-c1'
+    # a layer name the file doesn't have
+    assert get(files, '/parameters/p1.geojson?domainelement=p1-c1&layer=x') is None
+    assert get(files, '/parameters/p1.geojson?layer=p1-c1') is None
+
+
+def test_fallback(files, tmp_path):
+    # missing files
+    assert get(files, '/parameters/p2.geojson') is None
+    assert get(files, '/parameters/p1.geojson?domainelement=p1-c2') is None
+    (tmp_path / 'p1.geojson.gz').unlink()
+    assert get(
+        files, '/parameters/p1.geojson', **{'Accept-Encoding': 'gzip'}
+    ).content_encoding is None
+    # not a static GeoJSON file
+    assert get(files, '/parameters/p1') is None
+    assert get(files, '/parameters/p1.geojson?domainelement=../p1') is None
+    assert files.response(
+        Request.blank('/parameters/p1.geojson', method='POST')) is None
+
+
+def test_generation_mismatch(files, mocker):
+    assert get(files, '/parameters/p1.geojson') is not None
+    mocker.patch.object(
+        static_geojson, 'data_generation', return_value='something newer')
+    assert get(files, '/parameters/p1.geojson') is None
+
+
+def test_application_url_mismatch(files):
+    assert get(files, 'https://example.org/parameters/p1.geojson') is None
+
+
+def test_replace_directory(tmp_path, mocker):
+    mocker.patch.object(
+        static_geojson, 'data_generation', return_value=GENERATION)
+    target = tmp_path / 'geojson'
+    write_files(target)
+    files = GeoJsonFiles(target)
+    assert get(files, '/parameters/p1.geojson') is not None
+
+    new = tmp_path / '.geojson.new'
+    new.mkdir()
+    write_files(new, application_url='https://example.org')
+    replace_directory(new, target)
+    assert sorted(p.name for p in tmp_path.iterdir()) == ['geojson']
+    # the index of the new files is picked up right away
+    assert get(files, '/parameters/p1.geojson') is None
+    assert get(files, 'https://example.org/parameters/p1.geojson') is not None
@@ -1 +1,65 @@
+from math import ceil
 
+from clld.web.views import datatable_xhr_view
+from pyramid.httpexceptions import HTTPNotFound
+
+from crossgram import models
+from crossgram.lib.example_search import PAGE_SIZE, search_examples
+
+
+def example_search(request):
+    """Ranked full-text search over the examples of all contributions.
+
+    Renders an html page, or json for `/search/examples.json`.
+    """
+    ext = request.matchdict.get('ext')
+    if ext not in (None, 'json'):
+        raise HTTPNotFound()
+
+    query = request.params.get('q', '').strip()
+    try:
+        page = max(int(request.params.get('page', 1)), 1)
+    except ValueError:
+        page = 1
+    if query:
+        total, examples = search_examples(query, page)
+    else:
+        total, examples = 0, []
+
+    if ext == 'json':
+        request.override_renderer = 'json'
+        return {
+            'query': query,
+            'page': page,
+            'page_size': PAGE_SIZE,
+            'total': total,
+            'examples': [
+                {
+                    'id': example.id,
+                    'url': request.resource_url(example),
+                    'rank': example.search_rank,
+                    'language': example.language.name,
+                    'contribution': example.contribution.id,
+                    'primary_text': example.name,
+                    'analyzed': example.analyzed,
+                    'gloss': example.gloss,
+                    'translation': example.description,
+                }
+                for example in examples],
+        }
+    else:
+        return {
+            'query': query,
+            'page': page,
+            'pages': ceil(total / PAGE_SIZE),
+            'total': total,
+            'examples': examples,
+        }
+
+
+def gloss_search(request):
+    """Find gloss morphemes across all contributions."""
+    datatable = request.get_datatable('glosstokens', models.GlossToken)
+    if request.is_xhr and 'sEcho' in request.params:
+        return datatable_xhr_view(datatable, request)
+    return {'datatable': datatable}